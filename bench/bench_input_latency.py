@@ -0,0 +1,91 @@
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_parse import build_fixture  # noqa: E402
+from pp.rest import page_layout  # noqa: E402
+from pp.rest.page_layout import PageLayout  # noqa: E402
+from pp.rest.page_loader import PageLoader  # noqa: E402
+from pp.rest.process_decode import ProcessPageDecoder  # noqa: E402
+
+_tick_seconds = 0.002
+
+
+def load_fixture(page: str) -> PageLayout:
+    path = Path(page.partition('?')[0])
+    with open(path, 'rb') as f:
+        return page_layout.parse_page_stream(iter(lambda: f.read(64 * 1024), b''))
+
+
+def read_fixture(page: str) -> bytes:
+    return Path(page.partition('?')[0]).read_bytes()
+
+
+def no_cached_copy(page: str) -> Optional[PageLayout]:
+    return None
+
+
+def no_cached_body(page: str) -> Optional[bytes]:
+    return None
+
+
+def measure(loader: PageLoader, fixture: Path, loads: int) -> tuple[list[float], float]:
+    lateness = []
+    loaded = 0
+    loader.request(str(fixture) + '?0')
+    start = time.perf_counter()
+    due = start
+    while loaded < loads:
+        due += _tick_seconds
+        time.sleep(max(due - time.perf_counter(), 0.0))
+        now = time.perf_counter()
+        lateness.append(now - due)
+        due = max(due, now)
+        for result in loader.completed():
+            if result.error is not None:
+                raise result.error
+            loaded += 1
+            if loaded < loads:
+                loader.request(str(fixture) + '?' + str(loaded))
+    return lateness, time.perf_counter() - start
+
+
+def report(mode: str, lateness: list[float], elapsed: float, loads: int):
+    lateness.sort()
+    print(f'{mode:8}{statistics.median(lateness) * 1000:>10.2f}{lateness[int(len(lateness) * 0.99)] * 1000:>10.2f}'
+          f'{lateness[-1] * 1000:>10.2f}{elapsed / loads * 1000:>14.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure UI-thread tick lateness while large pages load')
+    parser.add_argument('--scale', type=int, default=20, help='copies of the football fixture to merge')
+    parser.add_argument('--loads', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Path(directory) / 'large.json'
+        fixture.write_bytes(build_fixture(args.scale))
+        print(f'fixture: {fixture.stat().st_size / 1024 / 1024:.1f} MiB, UI tick every {_tick_seconds * 1000:.0f} ms')
+        print(f'{"mode":8}{"p50 ms":>10}{"p99 ms":>10}{"max ms":>10}{"ms per load":>14}')
+
+        loader = PageLoader(load=load_fixture, load_cached=no_cached_copy)
+        report('thread', *measure(loader, fixture, args.loads), args.loads)
+        loader.shutdown()
+
+        decoder = ProcessPageDecoder(args.workers, fetch=read_fixture, fetch_cached=no_cached_body)
+        decoder.load(str(fixture))
+        loader = PageLoader(load=decoder.load, load_cached=decoder.load_cached)
+        report('process', *measure(loader, fixture, args.loads), args.loads)
+        loader.shutdown()
+        decoder.shutdown()
+
+
+if __name__ == '__main__':
+    main()
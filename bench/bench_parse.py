@@ -0,0 +1,120 @@
+import argparse
+import copy
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pp.rest import page_layout  # noqa: E402
+
+_mock_data = Path(page_layout.__file__).parent / 'mock_data'
+
+
+def build_fixture(scale: int) -> bytes:
+    with open(_mock_data / 'football.json', 'rb') as f:
+        source = json.load(f)
+    data = copy.deepcopy(source)
+    layout = data['layout']
+    id_step = 1_000_000
+    for copy_index in range(1, scale):
+        offset = copy_index * id_step
+        for section in ('coupons', 'cards', 'promotions', 'links', 'marketBlurbs', 'badges'):
+            for item_id, item in source['layout'].get(section, {}).items():
+                if not item_id.isdigit():
+                    continue
+                clone = copy.deepcopy(item)
+                if 'id' in clone and isinstance(clone['id'], int):
+                    clone['id'] += offset
+                for coupon in clone.get('coupons', []) if section == 'cards' else []:
+                    coupon['id'] += offset
+                layout[section][str(int(item_id) + offset)] = clone
+        for tab_id, tab in source['layout']['tabs'].items():
+            layout['tabs'][tab_id]['cards'] += [{'id': card['id'] + offset} for card in tab['cards']
+                                                if isinstance(card['id'], int)]
+        for market_id, market in source['attachments']['markets'].items():
+            data['attachments']['markets'][market_id + '.' + str(copy_index)] = copy.deepcopy(market)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _file_chunks(path: Path):
+    with open(path, 'rb') as f:
+        while chunk := f.read(64 * 1024):
+            yield chunk
+
+
+def _parse_full(path: Path):
+    with open(path, 'rb') as f:
+        return page_layout.parse_page(f.read())
+
+
+def _parse_stream(path: Path):
+    return page_layout.parse_page_stream(_file_chunks(path))
+
+
+_modes = {'full': _parse_full, 'stream': _parse_stream}
+
+
+def _peak_rss_kb() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_mode(mode: str, path: Path, repeats: int):
+    parse = _modes[mode]
+    rss_before = _peak_rss_kb()
+    parse(path)
+    rss_after = _peak_rss_kb()
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parse(path)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(path)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({'mode': mode, 'best_ms': min(timings) * 1000, 'rss_growth_kb': rss_after - rss_before,
+                      'traced_peak_kb': traced_peak // 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full and streaming strands page parsing')
+    parser.add_argument('--scale', type=int, default=20, help='copies of the football fixture to merge')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--mode', choices=_modes.keys(), help=argparse.SUPPRESS)
+    parser.add_argument('--fixture', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        run_mode(args.mode, args.fixture, args.repeats)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Path(directory) / 'large.json'
+        fixture.write_bytes(build_fixture(args.scale))
+        print(f'fixture: {fixture.stat().st_size / 1024 / 1024:.1f} MiB (scale {args.scale})')
+        print(f'{"mode":8}{"best ms":>10}{"RSS growth KiB":>16}{"traced peak KiB":>17}')
+        for mode in _modes:
+            output = subprocess.run([sys.executable, __file__, '--mode', mode, '--fixture', str(fixture),
+                                     '--repeats', str(args.repeats)], capture_output=True, check=True, text=True)
+            result = json.loads(output.stdout)
+            print(f'{mode:8}{result["best_ms"]:>10.1f}{result["rss_growth_kb"]:>16}{result["traced_peak_kb"]:>17}')
+
+
+if __name__ == '__main__':
+    main()
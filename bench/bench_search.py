@@ -0,0 +1,76 @@
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pp.model import Card, Coupon, Event, Tab  # noqa: E402
+from pp.rest.page_layout import PageLayout  # noqa: E402
+from pp.search import SearchIndex  # noqa: E402
+
+_teams = ['Arsenal', 'Barcelona', 'Celtic', 'Dortmund', 'Everton', 'Fiorentina', 'Galatasaray', 'Hibernian', 'Inter',
+          'Juventus', 'Kilmarnock', 'Liverpool', 'Monaco', 'Napoli', 'Olympiacos', 'Porto', 'Rangers', 'Sevilla',
+          'Tottenham', 'Udinese', 'Valencia', 'Wolves', 'Young Boys', 'Zenit']
+_places = ['Chicago', 'Dallas', 'Denver', 'Houston', 'Miami', 'Phoenix', 'Seattle', 'Boston', 'Atlanta', 'Detroit']
+_queries = ['liverpool v', 'chicago 7', 'champ', 'sev monaco', 'tott', 'zenit 12']
+
+
+def build_layout(events_per_page: int, page_index: int, rng: random.Random) -> PageLayout:
+    base = page_index * events_per_page * 10
+    competitions = {base + i: 'Championship ' + str(page_index) + '-' + str(i) for i in range(50)}
+    events, coupons, cards = {}, {}, {}
+    for i in range(events_per_page):
+        event_id = base + i
+        competition_id = base + rng.randrange(50)
+        name = rng.choice(_teams) + ' v ' + rng.choice(_teams) + ' ' + rng.choice(_places) + ' ' + str(i % 100)
+        events[event_id] = Event(event_id, name, competition_id, competitions[competition_id])
+        coupons[event_id] = Coupon(event_id, 'MATCH_ODDS', name + ' Match Odds', event_id, None)
+    coupon_ids = tuple(coupons)
+    for card_index in range(0, len(coupon_ids), 20):
+        card_id = base + card_index
+        cards[card_id] = Card(card_id, 'Card', coupon_ids[card_index:card_index + 20],
+                              [coupons[c] for c in coupon_ids[card_index:card_index + 20]])
+    tabs = [Tab(1, 'Matches', tuple(cards))]
+    return PageLayout(tabs=tabs, default_tab=1, page_info={}, cards=cards, coupons=coupons, events=events,
+                      competitions=competitions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure search index build and type-ahead query cost')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--events-per-page', type=int, default=2_500)
+    parser.add_argument('--budget-us', type=float, default=1000.0,
+                        help='fail if the mean keystroke time exceeds this')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    layouts = [build_layout(args.events_per_page, i, rng) for i in range(args.pages)]
+    index = SearchIndex()
+    start = time.perf_counter()
+    for i, layout in enumerate(layouts):
+        index.add_page('PAGE ' + str(i), 'Page ' + str(i), layout)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index.add_page('PAGE 0', 'Page 0', layouts[0])
+    reindex_seconds = time.perf_counter() - start
+    print(f'indexed {len(index)} entries in {build_seconds * 1000:.1f} ms, '
+          f're-indexed one page in {reindex_seconds * 1000:.1f} ms')
+
+    timings = []
+    for query in _queries:
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            index.search(query[:length])
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f'{len(timings)} keystrokes: mean {statistics.fmean(timings) * 1e6:.0f} us, '
+          f'p95 {timings[int(len(timings) * 0.95) - 1] * 1e6:.0f} us, max {timings[-1] * 1e6:.0f} us')
+    if statistics.fmean(timings) * 1e6 > args.budget_us:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
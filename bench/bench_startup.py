@@ -0,0 +1,72 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+_networking_modules = ('requests', 'urllib3', 'pp.rest.replay')
+_child = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main
+imported = time.perf_counter()
+from pp import screen
+screen.use_backend(screen.HeadlessBackend({rows}, {cols}))
+main.paint_first_frame(screen.newwin({rows}, {cols}, 0, 0), 'a2z', lambda command, **kwargs: None)
+painted = time.perf_counter()
+print(json.dumps({{'wall': time.time(), 'import': imported - started, 'paint': painted - imported,
+                  'networking': [name for name in {networking!r} if name in sys.modules]}}))
+'''
+_bare_child = 'import json, time; print(json.dumps({"wall": time.time()}))'
+
+
+def run_child(code: str) -> tuple[float, dict]:
+    started = time.time()
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result['wall'] - started, result
+
+
+def summarise(label: str, samples: list[float]):
+    samples = sorted(samples)
+    print(f'{label:<28} median {statistics.median(samples) * 1000:7.1f} ms   '
+          f'p95 {samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000:7.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time to first paint in a fresh interpreter')
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--cols', type=int, default=120)
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='fail if the median import plus first paint time exceeds this')
+    args = parser.parse_args()
+
+    code = _child.format(root=str(_root), rows=args.rows, cols=args.cols, networking=_networking_modules)
+    interpreter, imports, paints, to_paint, total = [], [], [], [], []
+    networking = set()
+    for _ in range(args.runs):
+        interpreter.append(run_child(_bare_child)[0])
+        wall, result = run_child(code)
+        imports.append(result['import'])
+        paints.append(result['paint'])
+        to_paint.append(result['import'] + result['paint'])
+        total.append(wall)
+        networking.update(result['networking'])
+
+    summarise('interpreter start', interpreter)
+    summarise('import main', imports)
+    summarise('first paint', paints)
+    summarise('import + first paint', to_paint)
+    summarise('process start to first paint', total)
+    print('networking imported before first paint: ' + (', '.join(sorted(networking)) or 'none'))
+    if statistics.median(to_paint) * 1000 > args.budget_ms or networking:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
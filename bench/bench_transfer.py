@@ -0,0 +1,95 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests  # noqa: E402
+
+from pp.rest import json_codec, page_layout  # noqa: E402
+from pp.rest.replay import FixtureStore, Replayer, ReplayServer, encoders, fixture_key, import_mock_data  # noqa: E402
+
+
+def fetch(session: requests.Session, url: str, encoding: str) -> tuple[int, bytes, float]:
+    start = time.perf_counter()
+    with session.get(url, headers={'Accept-Encoding': encoding}, stream=True) as response:
+        response.raise_for_status()
+        body = b''.join(response.iter_content(chunk_size=64 * 1024))
+        wire = page_layout.wire_bytes(response, len(body))
+    return wire, body, time.perf_counter() - start
+
+
+def best_of(repeats: int, function, *args) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def page_names() -> dict[str, str]:
+    return {fixture_key(request.slug, request.query_string): page
+            for page, request in page_layout.page_registry.items()}
+
+
+def parse_body(body: bytes):
+    page_layout.parse_page_stream(page_layout.iter_chunks(body))
+
+
+def available_decoders() -> list[str]:
+    names = []
+    for name in json_codec.decoder_names():
+        try:
+            json_codec.load_decoder(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report bytes on the wire and decode time for recorded strands pages')
+    parser.add_argument('--fixtures', type=Path, help='directory of recorded fixtures (default: the bundled mock pages)')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FixtureStore(args.fixtures if args.fixtures is not None else Path(directory))
+        if args.fixtures is None:
+            import_mock_data(store)
+        server = ReplayServer(Replayer(store, compress=True))
+        base_url = server.start()
+        session = requests.Session()
+        decoders = available_decoders()
+        names = page_names()
+        try:
+            print(f'{"page":12}{"encoding":>10}{"wire KiB":>10}{"body KiB":>10}{"ratio":>8}{"fetch ms":>10}')
+            bodies = {}
+            for key in store.keys():
+                slug, _, query_string = key.partition('?')
+                url = base_url + slug + '/v3?' + query_string
+                page = names.get(key, slug)
+                for encoding in ['identity'] + list(encoders):
+                    wire, body, seconds = min((fetch(session, url, encoding) for _ in range(args.repeats)),
+                                              key=lambda result: result[2])
+                    bodies[page] = body
+                    print(f'{page:12}{encoding:>10}{wire / 1024:>10.1f}{len(body) / 1024:>10.1f}'
+                          f'{wire / len(body):>8.2f}{seconds * 1000:>10.2f}')
+
+            print()
+            print(f'{"page":12}{"decoder":>10}{"loads ms":>10}{"stream parse ms":>17}')
+            for page, body in bodies.items():
+                for name in decoders:
+                    json_codec.use_decoder(name)
+                    loads_seconds = best_of(args.repeats, json_codec.loads, body)
+                    parse_seconds = best_of(args.repeats, parse_body, body)
+                    print(f'{page:12}{name:>10}{loads_seconds * 1000:>10.2f}{parse_seconds * 1000:>17.2f}')
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
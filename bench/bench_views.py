@@ -0,0 +1,223 @@
+import argparse
+import curses
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from pp import screen  # noqa: E402
+from pp.model import Card, Coupon, Market, Runner, Tab  # noqa: E402
+from pp.render_scheduler import RenderScheduler  # noqa: E402
+from pp.rest.page_layout import PageLayout  # noqa: E402
+from pp.rest.price_stream import ladder_price  # noqa: E402
+
+_coupons_per_card = 4
+_runners_per_market = 3
+_ticks_per_frame = 10
+_ticked_coupons = 12
+_sizes = [(120, 40), (100, 30)]
+
+
+def build_layout(lines_per_tab: int, seed: int = 0, tab_count: int = 6) -> PageLayout:
+    cards_per_tab = max(lines_per_tab // (_coupons_per_card + 1), 1)
+    tabs, cards, coupons = [], {}, {}
+    for tab_index in range(tab_count):
+        card_ids = []
+        for card_index in range(cards_per_tab):
+            card_id = (tab_index * cards_per_tab + card_index) * 100
+            coupon_ids = tuple(card_id + i + 1 for i in range(_coupons_per_card))
+            for coupon_id in coupon_ids:
+                coupons[coupon_id] = Coupon(coupon_id, 'MATCH_ODDS', 'Coupon ' + str(coupon_id + seed), coupon_id,
+                                            None)
+            cards[card_id] = Card(card_id, 'Card ' + str(card_id), coupon_ids,
+                                  [coupons[coupon_id] for coupon_id in coupon_ids])
+            card_ids.append(card_id)
+        tabs.append(Tab(tab_index + 1, 'Tab ' + str(tab_index + 1), tuple(card_ids)))
+    return PageLayout(tabs=tabs, default_tab=1, page_info={}, cards=cards, coupons=coupons)
+
+
+class Harness:
+    def __init__(self):
+        self.backend = screen.HeadlessBackend(*reversed(_sizes[0]))
+        screen.use_backend(self.backend)
+        self.scr = self.backend.stdscr
+        self.views = main.create_views(*self.scr.getmaxyx(), self._command)
+        self.scheduler = RenderScheduler(max_frame_rate=float('inf'))
+        main.full_render_current_state(self.scr, self.views, 'content')
+        screen.doupdate()
+
+    def _command(self, command: str, **kwargs: Any):
+        if command == 'LOAD_TAB':
+            main.load_tab(views=self.views, **kwargs)
+
+    def frame(self):
+        self.scheduler.render(self.views, *self.scr.getmaxyx())
+
+
+def flow_load_page(harness: Harness, layouts: list[PageLayout]) -> Iterator[None]:
+    while True:
+        for layout in layouts:
+            main.show_page('FOOTBALL', layout, harness.views)
+            yield
+
+
+def flow_switch_tabs(harness: Harness, layouts: list[PageLayout]) -> Iterator[None]:
+    main.show_page('FOOTBALL', layouts[0], harness.views)
+    tab_view = harness.views['tabs']
+    tab_count = len(layouts[0].tabs)
+    while True:
+        for _ in range(tab_count - 1):
+            tab_view.process_keystroke(curses.KEY_RIGHT)
+            tab_view.process_keystroke(ord('\n'))
+            yield
+        tab_view.process_keystroke(curses.KEY_LEFT, tab_count)
+        tab_view.process_keystroke(ord('\n'))
+        yield
+
+
+def flow_scroll(harness: Harness, layouts: list[PageLayout]) -> Iterator[None]:
+    main.show_page('FOOTBALL', layouts[0], harness.views)
+    content = harness.views['content']
+    while True:
+        for key in (curses.KEY_DOWN, curses.KEY_DOWN, curses.KEY_NPAGE, curses.KEY_UP, curses.KEY_NPAGE):
+            content.process_keystroke(key)
+            yield
+        content.process_keystroke(curses.KEY_HOME)
+        yield
+
+
+def flow_resize(harness: Harness, layouts: list[PageLayout]) -> Iterator[None]:
+    main.show_page('FOOTBALL', layouts[0], harness.views)
+    while True:
+        for cols, rows in _sizes[1:] + _sizes[:1]:
+            screen.resizeterm(rows, cols)
+            harness.scr.erase()
+            harness.scr.noutrefresh()
+            main.resize_all('content', harness.views, harness.scr)
+            harness.scheduler.invalidate_screen(rows, cols)
+            yield
+
+
+def flow_prices(harness: Harness, layouts: list[PageLayout]) -> Iterator[None]:
+    layout = layouts[0]
+    for coupon in layout.coupons.values():
+        coupon.market = Market(str(coupon.id), 'Match Odds', 'OPEN',
+                               [Runner(i, 'Runner ' + str(i), 'ACTIVE', ladder_price(20))
+                                for i in range(_runners_per_market)])
+    main.show_page('FOOTBALL', layout, harness.views)
+    content = harness.views['content']
+    first_tab = layout.tab(layout.default_tab)
+    keys = [(coupon.market.market_id, i) for card in first_tab.cards for coupon in card.coupons
+            for i in range(_runners_per_market)][:_ticked_coupons * _runners_per_market]
+    rng = random.Random(0)
+    while True:
+        content.apply_prices({rng.choice(keys): ladder_price(rng.randrange(40)) for _ in range(_ticks_per_frame)})
+        content.decay_highlights()
+        yield
+
+
+_flows: dict[str, Callable[[Harness, list[PageLayout]], Iterator[None]]] = {
+    'load_page': flow_load_page,
+    'switch_tabs': flow_switch_tabs,
+    'scroll': flow_scroll,
+    'resize': flow_resize,
+    'prices': flow_prices,
+}
+
+
+def run_flow(name: str, lines_per_tab: int, frames: int, tab_count: int = 6) -> dict[str, Any]:
+    layouts = [build_layout(lines_per_tab, seed, tab_count) for seed in range(2)]
+    harness = Harness()
+    steps = _flows[name](harness, layouts)
+    next(steps)
+    harness.frame()
+
+    stats = harness.backend.stats
+    before = stats.snapshot()
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        next(steps)
+        harness.frame()
+        timings.append(time.perf_counter() - start)
+    after = stats.snapshot()
+
+    tracemalloc.start()
+    for _ in range(frames):
+        next(steps)
+        harness.frame()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'flow': name,
+        'lines': lines_per_tab,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95) - 1] * 1000,
+        'cells_written': (after['cells_written'] - before['cells_written']) / frames,
+        'cells_flushed': (after['cells_flushed'] - before['cells_flushed']) / frames,
+        'bytes_flushed': (after['bytes_flushed'] - before['bytes_flushed']) / frames,
+        'alloc_peak_kb': traced_peak / 1024,
+    }
+
+
+def compare(results: list[dict[str, Any]], baseline_path: Path, time_tolerance: float,
+            cell_tolerance: float) -> list[str]:
+    baseline = {(r['flow'], r['lines']): r for r in json.loads(baseline_path.read_text())}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['flow'], result['lines']))
+        if previous is None:
+            continue
+        for metric, tolerance in (('mean_ms', time_tolerance), ('cells_written', cell_tolerance),
+                                  ('cells_flushed', cell_tolerance), ('bytes_flushed', cell_tolerance)):
+            if result[metric] > previous[metric] * (1 + tolerance) + 1e-9:
+                regressions.append(f'{result["flow"]} ({result["lines"]} lines): {metric} '
+                                   f'{previous[metric]:.2f} -> {result[metric]:.2f}')
+    return regressions
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description='Measure view render cost against a headless screen')
+    parser.add_argument('--lines', type=lambda s: [int(x) for x in s.split(',')], default=[100, 2_000, 50_000],
+                        help='comma separated content lines per tab')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--tabs', type=int, default=6, help='tabs per page')
+    parser.add_argument('--flows', type=lambda s: s.split(','), default=list(_flows.keys()))
+    parser.add_argument('--save', type=Path, help='write results as a JSON baseline')
+    parser.add_argument('--compare', type=Path, help='fail if results regress against a JSON baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.5)
+    parser.add_argument('--cell-tolerance', type=float, default=0.05)
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"flow":12}{"lines":>8}{"mean ms":>10}{"p95 ms":>10}{"cells written":>15}{"cells flushed":>15}'
+          f'{"bytes out":>11}{"alloc KiB":>11}')
+    for name in args.flows:
+        for lines in args.lines:
+            result = run_flow(name, lines, args.frames, args.tabs)
+            results.append(result)
+            print(f'{name:12}{lines:>8}{result["mean_ms"]:>10.3f}{result["p95_ms"]:>10.3f}'
+                  f'{result["cells_written"]:>15.1f}{result["cells_flushed"]:>15.1f}{result["bytes_flushed"]:>11.1f}'
+                  f'{result["alloc_peak_kb"]:>11.1f}')
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.compare is not None:
+        regressions = compare(results, args.compare, args.time_tolerance, args.cell_tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_bench()
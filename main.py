@@ -1,76 +1,203 @@
 import curses
 import functools
 import inspect
+import time
+from pathlib import Path
 from _curses import window
 from typing import Callable, Any, cast, Union, Optional
 
+from pp import screen
+from pp import a2z
 from pp.a2z import A2ZView
 from pp.abstract_view import AbstractView
+from pp.config import page_text_from_id
 from pp.footer import FooterView
 from pp.header import HeaderView
-from pp.content import ContentView
+from pp.key_input import read_key_batch, coalesce_keys
+from pp.model import Tab
+from pp.render_scheduler import RenderScheduler, ResizeDebouncer
+from pp.content import ContentView, price_up_pair, price_down_pair
+from pp.rest.live_refresh import LiveRefresher
 from pp.rest import page_layout
+from pp.rest.page_layout import PageLayout
+from pp.rest.page_loader import PageLoader
+from pp.rest.price_stream import PriceStream, SimulatedPriceFeed
+from pp.rest.speculative_prefetch import SpeculativePrefetcher
+from pp.search import SearchHit, SearchIndex
 from pp.tabs import TabView
+from pp.tracing import tracer
+
+_loading_tick_ms = 50
+_price_poll_ms = 16
+_startup_prefetch_pages = ['IN-PLAY']
+_search_page = 'SEARCH'
+_min_rows = 10
+_min_cols = a2z.extent_cols + 20
+_too_small_message = 'Terminal too small'
+_trace_refresh_seconds = 0.5
+_traced_spans = ('input', 'apply_loads', 'load_page', 'http_get', 'stream_parse', 'json_loads', 'build_layout',
+                 'build_tabs', 'fill_tab', 'set_new_tab_list', 'load_new_tab', 'render', 'flush')
 
 
 def main_page(scr: window):
     curses.curs_set(0)
-    scr.noutrefresh()
-    callbacks = {}
+    tracer.enabled = page_layout.config.trace_enabled
+    callbacks: dict[str, functools.partial[None]] = {}
 
     def command_callback(command: str, **kwargs: Any):
         if command in callbacks:
             callbacks[command](**kwargs)
 
+    if page_layout.config.shadow_frame_output:
+        screen.use_backend(screen.ShadowFrameBackend(scr, debug_overlay=page_layout.config.render_debug_overlay))
+    focus: list[str] = ['a2z']
+    views = paint_first_frame(scr, focus[0], command_callback)
+    keypress_table: dict[str, Callable[[int, int], None]] = {name: view.process_keystroke
+                                                             for name, view in views.items()}
+    dispatch_to: list[Callable[[int, int], None]] = [keypress_table[focus[0]]]
+
+    decoder = None
+    if page_layout.config.decode_workers > 0:
+        from pp.rest.process_decode import ProcessPageDecoder
+        decoder = ProcessPageDecoder(page_layout.config.decode_workers)
+    loader = PageLoader() if decoder is None else PageLoader(load=decoder.load, load_cached=decoder.load_cached)
+    prefetcher = SpeculativePrefetcher(loader)
+    refresher = LiveRefresher(loader, page_layout.config)
+    scheduler = RenderScheduler(page_layout.config.max_frame_rate)
+    resizer = ResizeDebouncer(page_layout.config.resize_settle_seconds)
+    price_stream = PriceStream()
+    price_feed = SimulatedPriceFeed(price_stream, page_layout.config.simulated_price_ticks) \
+        if page_layout.config.simulated_price_ticks > 0 else None
+    search_index = SearchIndex()
+    search_target: list[Optional[SearchHit]] = [None]
+    callbacks.update(setup_callbacks(views, focus, dispatch_to, keypress_table, loader, prefetcher, search_index,
+                                     search_target))
+    command_callback('LOAD_PAGE', page='HOMEPAGE')
+    loader.prefetch(_startup_prefetch_pages)
+
+    try:
+        run_event_loop(scr, views, focus, dispatch_to, keypress_table, loader, prefetcher, refresher, scheduler,
+                       resizer, search_index, search_target, price_stream, price_feed)
+    finally:
+        loader.shutdown()
+        if decoder is not None:
+            decoder.shutdown()
+        if price_feed is not None:
+            price_feed.stop()
+        if page_layout.config.trace_file is not None:
+            tracer.dump_chrome_trace(Path(page_layout.config.trace_file))
+
+
+def paint_first_frame(scr: window, focus: str, command_callback: Callable[..., None]) -> dict[str, AbstractView]:
+    scr.noutrefresh()
     setup_colours()
-    max_rows, max_cols = scr.getmaxyx()
-    views: dict[str, AbstractView] = {
+    views = create_views(*scr.getmaxyx(), command_callback)
+    full_render_current_state(scr, views, focus)
+    screen.doupdate()
+    return views
+
+
+def run_event_loop(scr: window,
+                   views: dict[str, AbstractView],
+                   focus: list[str],
+                   dispatch_to: list[Callable[[int, int], None]],
+                   keypress_table: dict[str, Callable[[int, int], None]],
+                   loader: PageLoader,
+                   prefetcher: SpeculativePrefetcher,
+                   refresher: LiveRefresher,
+                   scheduler: RenderScheduler,
+                   resizer: ResizeDebouncer,
+                   search_index: SearchIndex,
+                   search_target: list[Optional[SearchHit]],
+                   price_stream: PriceStream,
+                   price_feed: Optional[SimulatedPriceFeed]):
+    content = cast(ContentView, views['content'])
+    footer = cast(FooterView, views['footer'])
+    trace_refresh_due: Optional[float] = None
+    keep_going = True
+    while keep_going:
+        with tracer.span('apply_loads', 'ui'):
+            apply_completed_loads(views, loader, refresher, search_target, price_stream, price_feed)
+        index_loaded_pages(views, loader, search_index)
+        if price_stream.has_pending():
+            content.apply_prices(price_stream.drain())
+        content.decay_highlights()
+        prefetcher.tick()
+        refresher.tick()
+        if resizer.take_due():
+            layout_after_resize(scr, views, focus[0], scheduler)
+        if trace_refresh_due is not None and time.monotonic() >= trace_refresh_due:
+            footer.show_trace_summary(tracer.summary(_traced_spans) or 'Tracing...')
+            trace_refresh_due = time.monotonic() + _trace_refresh_seconds
+        if not resizer.pending and fits_layout(*scr.getmaxyx()):
+            scheduler.render(views, *scr.getmaxyx())
+
+        keys = read_key_batch(scr, next_timeout_ms(loader, prefetcher, refresher, scheduler, resizer, content,
+                                                   price_feed is not None, trace_refresh_due))
+        for key, count in coalesce_keys(keys):
+            if key == ord('q') and not is_typing_search(views, focus[0]):
+                keep_going = False
+                break
+            elif key == ord('\t'):
+                set_focus(next_focus(focus[0]), views, focus, dispatch_to, keypress_table)
+            elif key == curses.KEY_RESIZE:
+                screen.resizeterm(*scr.getmaxyx())
+                screen.doupdate()
+                resizer.note_resize()
+            elif key == curses.KEY_F12:
+                if trace_refresh_due is None:
+                    tracer.enabled = True
+                    trace_refresh_due = time.monotonic()
+                else:
+                    tracer.enabled = page_layout.config.trace_enabled
+                    trace_refresh_due = None
+                    footer.show_trace_summary(None)
+            else:
+                with tracer.span('input', 'ui', key=key, count=count):
+                    dispatch_to[0](key, count)
+
+
+def create_views(max_rows: int, max_cols: int, command_callback: Callable[..., None]) -> dict[str, AbstractView]:
+    return {
         'header': HeaderView(max_cols),
         'footer': FooterView(max_rows, max_cols),
         'a2z': A2ZView(max_rows, command_callback),
         'tabs': TabView(max_cols, command_callback),
         'content': ContentView(max_rows, max_cols, command_callback)
     }
-    keypress_table: dict[str, Callable[[int], None]] = {name: view.process_keystroke for name, view in views.items()}
-    focus: list[str] = ['a2z']
-    dispatch_to: list[Callable[[int], None]] = [keypress_table[focus[0]]]
 
-    full_render_current_state(scr, views, focus[0])
-    curses.doupdate()
 
-    callbacks = setup_callbacks(views, focus, dispatch_to)
-    command_callback('LOAD_PAGE', page='HOMEPAGE')
-
-    keep_going = True
-    while keep_going:
-        update_render_current_state(scr, views)
-        curses.doupdate()
-
-        key: int = scr.getch()
-        if key == ord('q'):
-            keep_going = False
-        elif key == ord('\t'):
-            focus[0] = next_focus(focus[0])
-            update_focuses(views, focus[0])
-            dispatch_to[0] = keypress_table[focus[0]]
-        elif key == curses.KEY_RESIZE:
-            curses.resizeterm(*scr.getmaxyx())
-            scr.erase()
-            scr.noutrefresh()
-            resize_all(focus[0], views, scr)
-        else:
-            dispatch_to[0](key)
+def next_timeout_ms(loader: PageLoader, prefetcher: SpeculativePrefetcher, refresher: LiveRefresher,
+                    scheduler: RenderScheduler, resizer: ResizeDebouncer, content: ContentView,
+                    is_streaming: bool, trace_refresh_due: Optional[float] = None) -> int:
+    timeout = _loading_tick_ms if loader.has_pending() else -1
+    if is_streaming:
+        timeout = _price_poll_ms if timeout < 0 else min(timeout, _price_poll_ms)
+    for due in (prefetcher.seconds_until_due(), refresher.seconds_until_due(), scheduler.seconds_until_frame(),
+                resizer.seconds_until_due(), content.seconds_until_highlight_change(),
+                None if trace_refresh_due is None else max(trace_refresh_due - time.monotonic(), 0.0)):
+        if due is not None:
+            due_ms = max(round(due * 1000), 1)
+            timeout = due_ms if timeout < 0 else min(timeout, due_ms)
+    return timeout
 
 
 def setup_colours():
-    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_GREEN)
-    curses.init_pair(2, curses.COLOR_WHITE, curses.COLOR_BLACK)
-    curses.init_pair(3, curses.COLOR_GREEN, curses.COLOR_BLACK)
+    screen.init_pair(1, curses.COLOR_WHITE, curses.COLOR_GREEN)
+    screen.init_pair(2, curses.COLOR_WHITE, curses.COLOR_BLACK)
+    screen.init_pair(3, curses.COLOR_GREEN, curses.COLOR_BLACK)
+    screen.init_pair(price_up_pair, curses.COLOR_RED, curses.COLOR_BLACK)
+    screen.init_pair(price_down_pair, curses.COLOR_GREEN, curses.COLOR_BLACK)
 
 
 def setup_callbacks(views: dict[str, AbstractView],
                     focus: list[str],
-                    dispatch_to: list[Callable[[int], None]]) -> dict[str, functools.partial[None]]:
+                    dispatch_to: list[Callable[[int, int], None]],
+                    keypress_table: dict[str, Callable[[int, int], None]],
+                    loader: PageLoader,
+                    prefetcher: SpeculativePrefetcher,
+                    search_index: SearchIndex,
+                    search_target: list[Optional[SearchHit]]) -> dict[str, functools.partial[None]]:
     def close_over(function: Callable[[Any], None]) -> functools.partial[None]:
         sig = inspect.signature(function)
         result = function
@@ -80,11 +207,24 @@ def setup_callbacks(views: dict[str, AbstractView],
             result = functools.partial(result, focus=focus)
         if 'dispatch_to' in sig.parameters:
             result = functools.partial(result, dispatch_to=dispatch_to)
+        if 'loader' in sig.parameters:
+            result = functools.partial(result, loader=loader)
+        if 'prefetcher' in sig.parameters:
+            result = functools.partial(result, prefetcher=prefetcher)
+        if 'keypress_table' in sig.parameters:
+            result = functools.partial(result, keypress_table=keypress_table)
+        if 'search_index' in sig.parameters:
+            result = functools.partial(result, search_index=search_index)
+        if 'search_target' in sig.parameters:
+            result = functools.partial(result, search_target=search_target)
         return result
 
     return {
         'LOAD_PAGE': close_over(load_page),
-        'LOAD_TAB': close_over(load_tab)
+        'LOAD_TAB': close_over(load_tab),
+        'HOVER_PAGE': close_over(hover_page),
+        'SEARCH': close_over(search),
+        'OPEN_SEARCH_HIT': close_over(open_search_hit)
     }
 
 
@@ -93,11 +233,6 @@ def full_render_current_state(scr: window, views: dict[str, AbstractView], focus
         view.full_render(*scr.getmaxyx(), focus == name)
 
 
-def update_render_current_state(scr: window, views: dict[str, AbstractView]):
-    for view in views.values():
-        view.update_render(*scr.getmaxyx())
-
-
 def resize_all(focus: str,
                views: dict[str, AbstractView],
                scr: window):
@@ -105,6 +240,27 @@ def resize_all(focus: str,
         view.on_resize(*scr.getmaxyx(), focus == name)
 
 
+def fits_layout(max_rows: int, max_cols: int) -> bool:
+    return max_rows >= _min_rows and max_cols >= _min_cols
+
+
+def layout_after_resize(scr: window,
+                        views: dict[str, AbstractView],
+                        focus: str,
+                        scheduler: RenderScheduler):
+    max_rows, max_cols = scr.getmaxyx()
+    if not fits_layout(max_rows, max_cols):
+        notice = screen.newwin(max_rows, max_cols, 0, 0)
+        notice.addnstr(0, 0, _too_small_message, max_cols - 1)
+        notice.noutrefresh()
+        screen.doupdate()
+        return
+    scr.erase()
+    scr.noutrefresh()
+    resize_all(focus, views, scr)
+    scheduler.invalidate_screen(max_rows, max_cols)
+
+
 def next_focus(focus: str) -> str:
     if focus == 'a2z':
         return 'tabs'
@@ -120,21 +276,136 @@ def update_focuses(views: dict[str, AbstractView],
         view.on_change_focus(focus == name)
 
 
+def set_focus(focus_to: str,
+              views: dict[str, AbstractView],
+              focus: list[str],
+              dispatch_to: list[Callable[[int, int], None]],
+              keypress_table: dict[str, Callable[[int, int], None]]):
+    focus[0] = focus_to
+    update_focuses(views, focus[0])
+    dispatch_to[0] = keypress_table[focus[0]]
+
+
+def is_typing_search(views: dict[str, AbstractView], focus: str) -> bool:
+    return focus == 'content' and cast(ContentView, views['content']).search_query is not None
+
+
 def load_page(page: str,
-              views: dict[str, AbstractView]):
-    page_data = page_layout.load_page(page)
-    cast(TabView, views['tabs']).set_new_tab_list(page_id=page, page_info=page_data.page_info,
-                                                  tabs=page_data.tabs, default_tab=page_data.default_tab)
+              views: dict[str, AbstractView],
+              focus: list[str],
+              dispatch_to: list[Callable[[int, int], None]],
+              keypress_table: dict[str, Callable[[int, int], None]],
+              loader: PageLoader):
+    if page == _search_page:
+        loader.leave_page()
+        cast(TabView, views['tabs']).set_new_tab_list(page_id=page, page_info={}, tabs=[])
+        cast(ContentView, views['content']).start_search()
+        set_focus('content', views, focus, dispatch_to, keypress_table)
+        return
+    loader.request(page)
+    cast(TabView, views['tabs']).show_loading(page)
+    cast(ContentView, views['content']).show_message('Loading...')
+    loader.prefetch(adjacent for adjacent in cast(A2ZView, views['a2z']).adjacent_pages() if adjacent != _search_page)
+
+
+def hover_page(page: str,
+               prefetcher: SpeculativePrefetcher):
+    if page != _search_page:
+        prefetcher.hover(page)
+
+
+def search(query: str,
+           views: dict[str, AbstractView],
+           search_index: SearchIndex):
+    cast(ContentView, views['content']).show_search_results(query, *search_index.search(query))
+
+
+def open_search_hit(hit: SearchHit,
+                    views: dict[str, AbstractView],
+                    loader: PageLoader,
+                    search_target: list[Optional[SearchHit]]):
+    search_target[0] = hit
+    cast(A2ZView, views['a2z']).select_page(hit.page)
+    loader.request(hit.page)
+    cast(TabView, views['tabs']).show_loading(hit.page)
+    cast(ContentView, views['content']).show_message('Loading...')
+
+
+def index_loaded_pages(views: dict[str, AbstractView],
+                       loader: PageLoader,
+                       search_index: SearchIndex):
+    loaded = loader.loaded_pages()
+    for page, layout in loaded:
+        search_index.add_page(page, page_text_from_id.get(page, page), layout)
+    query = cast(ContentView, views['content']).search_query
+    if loaded and query:
+        search(query, views, search_index)
+
+
+def apply_completed_loads(views: dict[str, AbstractView],
+                          loader: PageLoader,
+                          refresher: LiveRefresher,
+                          search_target: list[Optional[SearchHit]],
+                          price_stream: PriceStream,
+                          price_feed: Optional[SimulatedPriceFeed]):
+    for result in loader.completed():
+        if result.error is not None:
+            cast(TabView, views['tabs']).set_new_tab_list(page_id=result.page, page_info={}, tabs=[])
+            cast(ContentView, views['content']).show_message('Could not load page: ' + str(result.error))
+            continue
+
+        if result.is_refresh and refresher.is_watching(result.page):
+            changes = refresher.diff(result.layout)
+            if changes.structure_changed:
+                show_page(result.page, result.layout, views, keep_selected_tab=True, price_feed=price_feed)
+            else:
+                rebind_page(result.layout, views)
+                cast(ContentView, views['content']).update_coupons(result.layout.coupons, changes.changed_coupons)
+                price_stream.push_all(changes.price_ticks)
+        else:
+            target = search_target[0] if search_target[0] is not None and search_target[0].page == result.page \
+                else None
+            search_target[0] = None
+            show_page(result.page, result.layout, views, keep_selected_tab=result.is_refresh, target=target,
+                      price_feed=price_feed)
+        refresher.watch(result.page, result.layout)
+
+
+def show_page(page: str,
+              page_data: PageLayout,
+              views: dict[str, AbstractView],
+              keep_selected_tab: bool = False,
+              target: Optional[SearchHit] = None,
+              price_feed: Optional[SimulatedPriceFeed] = None):
+    tab_view = cast(TabView, views['tabs'])
+    selected_tab = page_data.default_tab
+    if keep_selected_tab and any(tab.id == tab_view.selected_tab_id for tab in page_data.tabs):
+        selected_tab = tab_view.selected_tab_id
+    if target is not None and any(tab.id == target.tab_id for tab in page_data.tabs):
+        selected_tab = target.tab_id
+    with tracer.span('set_new_tab_list', 'ui', page=page):
+        tab_view.set_new_tab_list(page_id=page, page_info=page_data.page_info,
+                                  tabs=page_data.tabs, default_tab=selected_tab, tab_loader=page_data.tab)
+    load_tab(views=views, tab=page_data.tab(selected_tab), page_info=page_data.page_info)
+    if target is not None:
+        cast(ContentView, views['content']).scroll_to_coupon(target.coupon_id)
+    if price_feed is not None:
+        price_feed.watch(page_data)
+
 
-    default_tab = next((tab for tab in page_data.tabs if tab['id'] == page_data.default_tab), None)
-    load_tab(views=views, tab=default_tab, page_info=page_data.page_info)
+def rebind_page(page_data: PageLayout, views: dict[str, AbstractView]):
+    # a price-only refresh keeps the screen but later tab switches must read the new layout
+    tab_view = cast(TabView, views['tabs'])
+    tab_view.set_tab_loader(page_data.tab)
+    cast(ContentView, views['content']).rebind_tab(page_data.tab(tab_view.selected_tab_id))
 
 
 def load_tab(views: dict[str, AbstractView],
-             tab: Optional[dict[str, Union[str, int, list[int]]]],
+             tab: Optional[Tab],
              page_info: dict[str, Union[str, int]]):
-    if 'content' in views.keys():
-        cast(ContentView, views['content']).load_new_tab(tab, page_info)
+    if 'content' in views.keys() and tab is not None:
+        with tracer.span('load_new_tab', 'ui', tab=tab.id):
+            cast(ContentView, views['content']).load_new_tab(tab, page_info)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@ import curses
 from _curses import window
 from typing import Optional, Callable
 
-from pp.abstract_view import AbstractView
+from pp import screen
+from pp.abstract_view import AbstractView, DirtyRect
 from pp.config import all_sports, other_menu_items, page_id_from_text
 
 longest_name_length = len(max(all_sports + other_menu_items, key=lambda k: len(k)))
@@ -23,16 +24,17 @@ extent_cols = _pad_width + 4
 class A2ZView(AbstractView):
     def __init__(self, max_rows: int, parent_callback: Optional[Callable] = None):
         self._current_selection = next((i for i, x in enumerate(menu_items) if x['text'] == default_menu_item), 0)
-        self._previous_selection = self._current_selection
+        self._previous_selection: Optional[int] = None
 
         # noinspection PyTypeChecker
-        self._menu_pad: window = curses.newpad(_pad_height, _pad_width)
+        self._menu_pad: window = screen.newpad(_pad_height, _pad_width)
         self._pad_first_line = 0
         self._pad_update_needed = True
         self._write_menu_into_pad()
+        self._update_selection_chevron()
 
         # noinspection PyTypeChecker
-        self._border_wnd: window = curses.newwin(max_rows - 2, extent_cols, _border_top, 0)
+        self._border_wnd: window = screen.newwin(max_rows - 2, extent_cols, _border_top, 0)
         self._is_focused = False
 
         self._parent_callback = parent_callback
@@ -48,13 +50,17 @@ class A2ZView(AbstractView):
         self.update_render(max_rows, max_cols)
 
     def update_render(self, max_rows: int, max_cols: int):
-        self._update_selection_chevron()
         if self._pad_update_needed:
             self._pad_update_needed = False
             self._menu_pad.noutrefresh(self._pad_first_line, 0,
                                        _pad_top, _pad_left, max_rows - _pad_top - 1,
                                        _pad_width + _pad_left)
 
+    def dirty_region(self, max_rows: int, max_cols: int) -> Optional[DirtyRect]:
+        if not self._pad_update_needed:
+            return None
+        return DirtyRect(_pad_top, _pad_left, max_rows - _pad_top - 1, _pad_width + _pad_left)
+
     def on_change_focus(self, is_focused: bool):
         self._redraw_border(is_focused)
 
@@ -67,19 +73,20 @@ class A2ZView(AbstractView):
         if always or self._is_focused != is_focused:
             self._is_focused = is_focused
             if is_focused:
-                self._draw_border(curses.color_pair(3))
+                self._draw_border(screen.color_pair(3))
             else:
-                self._draw_border(curses.color_pair(2))
+                self._draw_border(screen.color_pair(2))
             self._border_wnd.noutrefresh()
             self._maybe_scroll()
             self._pad_update_needed = True
 
     def _update_selection_chevron(self):
-        previous = menu_items[self._previous_selection]
-        current = menu_items[self._current_selection]
+        if self._previous_selection == self._current_selection:
+            return
+        if self._previous_selection is not None:
+            self._menu_pad.addch(menu_items[self._previous_selection]['y_pos'], _chevron_x, ' ')
+        self._menu_pad.addch(menu_items[self._current_selection]['y_pos'], _chevron_x, '>')
         self._previous_selection = self._current_selection
-        self._menu_pad.addch(previous['y_pos'], _chevron_x, ' ')
-        self._menu_pad.addch(current['y_pos'], _chevron_x, '>')
         self._pad_update_needed = True
 
     def _draw_border(self, colour_pair: int):
@@ -87,17 +94,39 @@ class A2ZView(AbstractView):
         self._border_wnd.border()
         self._border_wnd.addstr(0, 3, "A-Z Sports", colour_pair)
 
-    def process_keystroke(self, key: int):
+    def process_keystroke(self, key: int, count: int = 1):
         if key == curses.KEY_DOWN:
-            self._current_selection = min(self._current_selection + 1, len(menu_items) - 1)
+            self._current_selection = min(self._current_selection + count, len(menu_items) - 1)
+            self._update_selection_chevron()
             self._maybe_scroll()
+            self._notify_hover()
         elif key == curses.KEY_UP:
-            self._current_selection = max(self._current_selection - 1, 0)
+            self._current_selection = max(self._current_selection - count, 0)
+            self._update_selection_chevron()
             self._maybe_scroll()
+            self._notify_hover()
         elif key == curses.KEY_ENTER or key == ord('\n') or key == ord(' '):
             if self._parent_callback is not None:
                 self._parent_callback('LOAD_PAGE', page=page_id_from_text[menu_items[self._current_selection]['text']])
 
+    def select_page(self, page: str):
+        selection = next((i for i, item in enumerate(menu_items) if page_id_from_text[item['text']] == page), None)
+        if selection is None:
+            return
+        self._current_selection = selection
+        self._update_selection_chevron()
+        self._maybe_scroll()
+
+    def _notify_hover(self):
+        if self._parent_callback is not None:
+            self._parent_callback('HOVER_PAGE', page=page_id_from_text[menu_items[self._current_selection]['text']])
+
+    def adjacent_pages(self, radius: int = 1) -> list[str]:
+        first = max(self._current_selection - radius, 0)
+        last = min(self._current_selection + radius, len(menu_items) - 1)
+        return [page_id_from_text[menu_items[i]['text']] for i in range(first, last + 1)
+                if i != self._current_selection]
+
     def _maybe_scroll(self):
         y_pos = menu_items[self._current_selection]['y_pos']
         inner_height = self._border_wnd.getmaxyx()[0] - _pad_top
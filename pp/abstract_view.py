@@ -1,4 +1,23 @@
 from abc import ABCMeta, abstractmethod
+from typing import Optional
+
+
+class DirtyRect:
+    __slots__ = ('top', 'left', 'bottom', 'right')
+
+    def __init__(self, top: int, left: int, bottom: int, right: int):
+        self.top = top
+        self.left = left
+        self.bottom = bottom
+        self.right = right
+
+    def union(self, other: 'DirtyRect') -> 'DirtyRect':
+        return DirtyRect(min(self.top, other.top), min(self.left, other.left),
+                         max(self.bottom, other.bottom), max(self.right, other.right))
+
+    @property
+    def area(self) -> int:
+        return max(self.bottom - self.top + 1, 0) * max(self.right - self.left + 1, 0)
 
 
 class AbstractView(metaclass=ABCMeta):
@@ -10,6 +29,10 @@ class AbstractView(metaclass=ABCMeta):
     def update_render(self, max_rows: int, max_cols: int):
         pass
 
+    @abstractmethod
+    def dirty_region(self, max_rows: int, max_cols: int) -> Optional[DirtyRect]:
+        pass
+
     @abstractmethod
     def on_change_focus(self, is_focused: bool):
         pass
@@ -19,5 +42,5 @@ class AbstractView(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def process_keystroke(self, key: int):
+    def process_keystroke(self, key: int, count: int = 1):
         pass
@@ -1,7 +1,23 @@
+import os
+from typing import Optional
+
+
 class PPConfig:
     def __init__(self, app_key: str = 'vsd0Rm5ph2sS2uaK', betex_region: str = 'GBR', jurisdiction: str = 'intl',
                  currency: str = 'GBP', locale: str = 'en_GB', language: str = 'en', region: str = 'UK',
-                 timezone: str = 'Europe/London'):
+                 timezone: str = 'Europe/London', page_cache_max_bytes: int = 32 * 1024 * 1024,
+                 default_page_ttl: float = 60.0, page_ttls: Optional[dict[str, float]] = None,
+                 mocked: Optional[bool] = None, cache_dir: Optional[str] = None, http_pool_size: int = 8,
+                 http_connect_timeout: float = 3.05, http_read_timeout: float = 10.0, http_retries: int = 2,
+                 http_backoff_factor: float = 0.3, live_refresh_intervals: Optional[dict[str, float]] = None,
+                 max_frame_rate: float = 60.0, shadow_frame_output: Optional[bool] = None,
+                 render_debug_overlay: Optional[bool] = None, strands_base_url: Optional[str] = None,
+                 record_dir: Optional[str] = None, resize_settle_seconds: float = 0.1,
+                 simulated_price_ticks: Optional[float] = None, trace_enabled: Optional[bool] = None,
+                 trace_file: Optional[str] = None, decode_workers: Optional[int] = None,
+                 json_decoder: Optional[str] = None, request_rate: Optional[float] = None,
+                 request_burst: float = 8.0, disk_cache_max_bytes: int = 256 * 1024 * 1024,
+                 disk_cache_max_age: float = 7 * 24 * 60 * 60.0, stream_parse_min_bytes: int = 1024 * 1024):
         self.app_key = app_key
         self.betex_region = betex_region
         self.jurisdiction = jurisdiction
@@ -10,6 +26,54 @@ class PPConfig:
         self.language = language
         self.region = region
         self.timezone = timezone
+        self.page_cache_max_bytes = page_cache_max_bytes
+        self.default_page_ttl = default_page_ttl
+        self.page_ttls = page_ttls if page_ttls is not None else {'HOMEPAGE': 120.0, 'IN-PLAY': 10.0}
+        self.mocked = mocked if mocked is not None else env_flag('PADDYCURSES_MOCKED', default=True)
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.disk_cache_max_bytes = disk_cache_max_bytes
+        self.disk_cache_max_age = disk_cache_max_age
+        self.stream_parse_min_bytes = stream_parse_min_bytes
+        self.http_pool_size = http_pool_size
+        self.http_connect_timeout = http_connect_timeout
+        self.http_read_timeout = http_read_timeout
+        self.http_retries = http_retries
+        self.http_backoff_factor = http_backoff_factor
+        self.live_refresh_intervals = live_refresh_intervals if live_refresh_intervals is not None \
+            else {'IN-PLAY': 5.0}
+        self.max_frame_rate = max_frame_rate
+        self.resize_settle_seconds = resize_settle_seconds
+        self.shadow_frame_output = shadow_frame_output if shadow_frame_output is not None \
+            else env_flag('PADDYCURSES_SHADOW_FRAME')
+        self.render_debug_overlay = render_debug_overlay if render_debug_overlay is not None \
+            else env_flag('PADDYCURSES_RENDER_OVERLAY')
+        self.strands_base_url = strands_base_url if strands_base_url is not None \
+            else os.environ.get('PADDYCURSES_STRANDS_URL', 'https://strands.paddypower.com/sdspp/')
+        self.record_dir = record_dir if record_dir is not None else os.environ.get('PADDYCURSES_RECORD_DIR')
+        self.simulated_price_ticks = simulated_price_ticks if simulated_price_ticks is not None \
+            else float(os.environ.get('PADDYCURSES_SIMULATED_TICKS', '0'))
+        self.trace_file = trace_file if trace_file is not None else os.environ.get('PADDYCURSES_TRACE_FILE')
+        self.trace_enabled = trace_enabled if trace_enabled is not None \
+            else env_flag('PADDYCURSES_TRACE') or self.trace_file is not None
+        self.decode_workers = decode_workers if decode_workers is not None \
+            else int(os.environ.get('PADDYCURSES_DECODE_WORKERS', '0'))
+        self.json_decoder = json_decoder if json_decoder is not None \
+            else os.environ.get('PADDYCURSES_JSON_DECODER', 'auto')
+        self.request_rate = request_rate if request_rate is not None \
+            else float(os.environ.get('PADDYCURSES_REQUEST_RATE', '4'))
+        self.request_burst = request_burst
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'paddycurses')
 
 
 all_sports = ['American Football', 'Australian Rules', 'Baseball', 'Basketball', 'Boxing', 'Cricket', 'Current Affairs',
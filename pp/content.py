@@ -1,13 +1,122 @@
 import curses
+import time
 from _curses import window
-from typing import Optional, Callable
+from bisect import bisect_right
+from typing import Optional, Callable, Union
 
-from pp import a2z, tabs
-from pp.abstract_view import AbstractView
+from pp import a2z, screen, tabs
+from pp.abstract_view import AbstractView, DirtyRect
+from pp.model import Card, Coupon, EventMarket, Market, Price, Tab
+from pp.rest.price_stream import PriceKey
+from pp.search import SearchHit
+
+_overscan: int = 8
+_search_header_rows: int = 3
+_backspace_keys = (curses.KEY_BACKSPACE, 127, 8)
+_escape_key = 27
+_price_width: int = 8
+_runner_indent = "      "
+_highlight_stages = (0.5, 2.0)
+price_up_pair: int = 4
+price_down_pair: int = 5
+
+
+def _coupon_line(coupon: Coupon) -> str:
+    return "    " + coupon.label()
+
+
+def _event_line(shown: EventMarket) -> str:
+    return "    " + shown.event.name
+
+
+def _price_text(price: Optional[Price]) -> str:
+    if price is None:
+        return '-'
+    if price.numerator == price.denominator:
+        return 'EVS'
+    return price.fractional()
+
+
+def _market_height(market: Optional[Market]) -> int:
+    return len(market.runners) if market is not None else 0
+
+
+def _card_height(card: Card) -> int:
+    height = 1 + len(card.coupons) + len(card.event_markets)
+    for coupon in card.coupons:
+        height += _market_height(coupon.market) + len(coupon.event_markets)
+        for shown in coupon.event_markets:
+            height += _market_height(shown.market)
+    for shown in card.event_markets:
+        height += _market_height(shown.market)
+    return height
+
+
+class _TabLines:
+    # a tab's lines are measured and built a card at a time as the viewport reaches them
+    def __init__(self, cards: list[Card], build_card: Callable[[Card, int], list[str]]):
+        self._cards = cards
+        self._build_card = build_card
+        self._starts = [0]
+        self._built: dict[int, list[str]] = {}
+
+    def _measure_card(self) -> bool:
+        measured = len(self._starts) - 1
+        if measured == len(self._cards):
+            return False
+        self._starts.append(self._starts[-1] + _card_height(self._cards[measured]))
+        return True
+
+    def count_to(self, n: int) -> int:
+        while self._starts[-1] < n and self._measure_card():
+            pass
+        return min(n, self._starts[-1])
+
+    def __len__(self) -> int:
+        while self._measure_card():
+            pass
+        return self._starts[-1]
+
+    def _card_lines(self, card_index: int) -> list[str]:
+        lines = self._built.get(card_index)
+        if lines is None:
+            while len(self._starts) <= card_index and self._measure_card():
+                pass
+            lines = self._build_card(self._cards[card_index], self._starts[card_index])
+            self._built[card_index] = lines
+        return lines
+
+    def _locate(self, i: int) -> tuple[list[str], int]:
+        if i < 0 or self.count_to(i + 1) <= i:
+            raise IndexError(i)
+        card_index = bisect_right(self._starts, i) - 1
+        return self._card_lines(card_index), i - self._starts[card_index]
+
+    def __getitem__(self, i: int) -> str:
+        lines, offset = self._locate(i)
+        return lines[offset]
+
+    def __setitem__(self, i: int, line: str):
+        lines, offset = self._locate(i)
+        lines[offset] = line
+
+    def rebind(self, cards: list[Card]):
+        # same structure from a newer layout, so the offsets still hold for the cards not built yet
+        self._cards = cards
+
+    def build_coupon_card(self, coupon_id: int):
+        for card_index, card in enumerate(self._cards):
+            if any(coupon.id == coupon_id for coupon in card.coupons):
+                self._card_lines(card_index)
+                return
+
+
+_Items = Union[list[str], _TabLines]
 
 
 class ContentView(AbstractView):
-    def __init__(self, max_rows: int, max_cols: int, parent_callback: Optional[Callable] = None):
+    def __init__(self, max_rows: int, max_cols: int, parent_callback: Optional[Callable] = None,
+                 clock: Callable[[], float] = time.monotonic):
         self._current_selection = None
         self._previous_selection = self._current_selection
 
@@ -16,32 +125,60 @@ class ContentView(AbstractView):
         self._border_width = max_cols - self._border_left - 1
         self._border_height = max_rows - self._border_top - 1
 
-        # noinspection PyTypeChecker
-        self._menu_pad: window = curses.newpad(1000, 1000)
-        self._pad_first_line = 0
+        self._viewport_rows = 0
+        self._viewport_cols = 0
+        self._menu_pad: Optional[window] = None
+        self._pad_first_item = 0
+        self._first_line = 0
         self._pad_update_needed = True
-        # populate pad
+        self._size_viewport()
 
         # noinspection PyTypeChecker
-        self._border_wnd: window = curses.newwin(self._border_height, self._border_width,
+        self._border_wnd: window = screen.newwin(self._border_height, self._border_width,
                                                  self._border_top, self._border_left)
         self._is_focused = False
-        self._tab = None
+        self._tab: Optional[Tab] = None
         self._page_info = None
+        self._items: _Items = []
+        self._coupon_lines: dict[int, list[int]] = {}
+        self._runner_lines: dict[PriceKey, list[int]] = {}
+        self._line_prices: dict[int, Optional[Price]] = {}
+        self._ticked_prices: dict[PriceKey, Optional[Price]] = {}
+        self._updated_coupons: dict[int, Coupon] = {}
+        self._highlights: dict[int, tuple[float, int, int]] = {}
+        self._next_highlight_change: Optional[float] = None
+        self._clock = clock
+        self._search_query: Optional[str] = None
+        self._search_hits: list[SearchHit] = []
+        self._search_selection = 0
         self._parent_callback = parent_callback
 
+    def _size_viewport(self):
+        self._viewport_rows = max(self._border_height - 2, 1)
+        self._viewport_cols = max(self._border_width - 2, 1)
+        # noinspection PyTypeChecker
+        self._menu_pad = screen.newpad(self._viewport_rows + 2 * _overscan, self._viewport_cols + 1)
+
     def full_render(self, max_rows: int, max_cols: int, is_focused: bool):
         self._border_wnd.erase()
         self._redraw_border(is_focused, always=True)
         self.update_render(max_rows, max_cols)
 
     def update_render(self, max_rows: int, max_cols: int):
-        # self._update_selection_chevron()
         if self._pad_update_needed:
             self._pad_update_needed = False
-            self._menu_pad.noutrefresh(self._pad_first_line, 0,
-                                       self._border_top + 1, self._border_left + 1,
-                                       self._border_height, self._border_width)
+            top = self._border_top + 1
+            left = self._border_left + 1
+            self._menu_pad.noutrefresh(self._first_line - self._pad_first_item, 0,
+                                       top, left,
+                                       top + self._viewport_rows - 1, left + self._viewport_cols - 1)
+
+    def dirty_region(self, max_rows: int, max_cols: int) -> Optional[DirtyRect]:
+        if not self._pad_update_needed:
+            return None
+        top = self._border_top + 1
+        left = self._border_left + 1
+        return DirtyRect(top, left, top + self._viewport_rows - 1, left + self._viewport_cols - 1)
 
     def _draw_border(self, colour_pair: int):
         self._border_wnd.bkgd(' ', colour_pair)
@@ -52,11 +189,10 @@ class ContentView(AbstractView):
         if always or self._is_focused != is_focused:
             self._is_focused = is_focused
             if is_focused:
-                self._draw_border(curses.color_pair(3))
+                self._draw_border(screen.color_pair(3))
             else:
-                self._draw_border(curses.color_pair(2))
+                self._draw_border(screen.color_pair(2))
             self._border_wnd.noutrefresh()
-            # self._maybe_scroll()
             self._pad_update_needed = True
 
     def on_change_focus(self, is_focused: bool):
@@ -66,28 +202,263 @@ class ContentView(AbstractView):
         self._border_width = max_cols - self._border_left - 1
         self._border_height = max_rows - self._border_top - 1
         self._border_wnd.resize(self._border_height, self._border_width)
-        self._pad_update_needed = True
+        self._size_viewport()
+        self._scroll_to(self._first_line, always=True)
         self.full_render(max_rows, max_cols, is_focused)
 
-    def process_keystroke(self, key: int):
-        pass
+    def process_keystroke(self, key: int, count: int = 1):
+        if self._search_query is not None and self._process_search_keystroke(key, count):
+            return
+        if key == curses.KEY_DOWN:
+            self._scroll_to(self._first_line + count)
+        elif key == curses.KEY_UP:
+            self._scroll_to(self._first_line - count)
+        elif key == curses.KEY_NPAGE:
+            self._scroll_to(self._first_line + self._viewport_rows * count)
+        elif key == curses.KEY_PPAGE:
+            self._scroll_to(self._first_line - self._viewport_rows * count)
+        elif key == curses.KEY_HOME:
+            self._scroll_to(0)
+        elif key == curses.KEY_END:
+            self._scroll_to(len(self._items))
+
+    def _lines_before(self, n: int) -> int:
+        # how many of the first n lines exist, without measuring a whole tab to find out
+        if isinstance(self._items, _TabLines):
+            return self._items.count_to(n)
+        return min(n, len(self._items))
+
+    def _scroll_to(self, first_line: int, always: bool = False):
+        last_first_line = max(self._lines_before(first_line + self._viewport_rows) - self._viewport_rows, 0)
+        first_line = min(max(first_line, 0), last_first_line)
+        if first_line == self._first_line and not always:
+            return
+        self._first_line = first_line
+        pad_rows = self._viewport_rows + 2 * _overscan
+        if always or first_line < self._pad_first_item \
+                or first_line + self._viewport_rows > self._pad_first_item + pad_rows:
+            self._write_items_into_pad()
+        self._pad_update_needed = True
+
+    def _write_items_into_pad(self):
+        self._pad_first_item = max(self._first_line - _overscan, 0)
+        self._menu_pad.erase()
+        last_item = self._lines_before(self._pad_first_item + self._viewport_rows + 2 * _overscan)
+        for i in range(self._pad_first_item, last_item):
+            self._write_line(i - self._pad_first_item, i)
+        self._pad_update_needed = True
+
+    def _write_line(self, row: int, i: int):
+        line = self._items[i]
+        if i not in self._line_prices:
+            self._menu_pad.addnstr(row, 0, line, self._viewport_cols)
+            return
+        name_cols = self._viewport_cols - _price_width
+        if name_cols > 0:
+            self._menu_pad.addnstr(row, 0, line, name_cols)
+        self._write_price(row, i)
+
+    def _write_price(self, row: int, i: int):
+        x = max(self._viewport_cols - _price_width, 0)
+        text = _price_text(self._line_prices[i]).rjust(_price_width)[:self._viewport_cols - x]
+        self._menu_pad.addstr(row, x, text, self._highlight_attr(i))
+
+    def _highlight_attr(self, i: int) -> int:
+        highlight = self._highlights.get(i)
+        if highlight is None:
+            return 0
+        _, pair, stage = highlight
+        return screen.color_pair(pair) | curses.A_REVERSE if stage == 0 else screen.color_pair(pair)
+
+    def _draw_price(self, i: int):
+        row = i - self._pad_first_item
+        if 0 <= row < self._viewport_rows + 2 * _overscan:
+            self._write_price(row, i)
+            self._pad_update_needed = True
+
+    def _show_items(self, items: _Items):
+        self._items = items
+        self._highlights = {}
+        self._next_highlight_change = None
+        self._first_line = 0
+        self._write_items_into_pad()
+
+    def _set_item(self, y: int, line: str):
+        self._items[y] = line
+        row = y - self._pad_first_item
+        if 0 <= row < self._viewport_rows + 2 * _overscan:
+            self._menu_pad.move(row, 0)
+            self._menu_pad.clrtoeol()
+            self._write_line(row, y)
+            self._pad_update_needed = True
+
+    def _clear_tab_lines(self):
+        self._coupon_lines = {}
+        self._runner_lines = {}
+        self._line_prices = {}
+        self._ticked_prices = {}
+        self._updated_coupons = {}
+
+    def show_message(self, message: str):
+        self._tab = None
+        self._clear_tab_lines()
+        self._search_query = None
+        self._show_items(['  ' + message])
+
+    @property
+    def search_query(self) -> Optional[str]:
+        return self._search_query
 
-    def load_new_tab(self, tab, page_info):
+    def start_search(self):
+        self.show_search_results('', [], 0)
+
+    def show_search_results(self, query: str, hits: list[SearchHit], total: int):
+        self._tab = None
+        self._clear_tab_lines()
+        self._search_query = query
+        self._search_hits = hits
+        self._search_selection = 0
+        if not query:
+            status = '  Type to search loaded events, competitions and coupons'
+        elif total > len(hits):
+            status = '  Showing ' + str(len(hits)) + ' of ' + str(total) + ' matches'
+        else:
+            status = '  ' + str(total) + (' match' if total == 1 else ' matches')
+        self._show_items(['  Search: ' + query + '_', status, ''] + [self._search_line(i) for i in range(len(hits))])
+
+    def _search_line(self, i: int) -> str:
+        return ('  > ' if i == self._search_selection else '    ') + self._search_hits[i].label()
+
+    def _move_search_selection(self, selection: int):
+        selection = min(max(selection, 0), len(self._search_hits) - 1)
+        if selection < 0 or selection == self._search_selection:
+            return
+        previous = self._search_selection
+        self._search_selection = selection
+        self._set_item(_search_header_rows + previous, self._search_line(previous))
+        self._set_item(_search_header_rows + selection, self._search_line(selection))
+        line = _search_header_rows + selection
+        if line < self._first_line:
+            self._scroll_to(line)
+        elif line >= self._first_line + self._viewport_rows:
+            self._scroll_to(line - self._viewport_rows + 1)
+
+    def _process_search_keystroke(self, key: int, count: int) -> bool:
+        query = self._search_query
+        if key == curses.KEY_DOWN:
+            self._move_search_selection(self._search_selection + count)
+        elif key == curses.KEY_UP:
+            self._move_search_selection(self._search_selection - count)
+        elif key == curses.KEY_ENTER or key == ord('\n'):
+            if self._search_hits and self._parent_callback is not None:
+                self._parent_callback('OPEN_SEARCH_HIT', hit=self._search_hits[self._search_selection])
+        elif key in _backspace_keys:
+            if query and self._parent_callback is not None:
+                self._parent_callback('SEARCH', query=query[:-1])
+        elif key == _escape_key:
+            self.show_search_results('', [], 0)
+        elif 32 <= key < 127:
+            if self._parent_callback is not None:
+                self._parent_callback('SEARCH', query=query + chr(key) * count)
+        else:
+            return False
+        return True
+
+    def scroll_to_coupon(self, coupon_id: Optional[int]):
+        if isinstance(self._items, _TabLines):
+            self._items.build_coupon_card(coupon_id)
+        lines = self._coupon_lines.get(coupon_id)
+        if lines:
+            self._scroll_to(max(min(lines) - 1, 0))
+
+    def load_new_tab(self, tab: Tab, page_info):
         self._page_info = page_info
         self._tab = tab
-        self._menu_pad.erase()
+        self._search_query = None
 
-        items = []
-        for card in tab['cards']:
-            items.append("  " + card['title'])
-            coupon_ids = [coupon['id'] for coupon in card['coupons']]
-            for coupon_id in coupon_ids:
-                coupon = tab['coupons'][coupon_id]
-                if 'title' in coupon:
-                    items.append("    " + coupon['title'])
+        self._clear_tab_lines()
+        self._show_items(_TabLines(tab.cards, self._card_lines))
+
+    def _card_lines(self, card: Card, first_line: int) -> list[str]:
+        items = ["  " + card.title]
+        for coupon in card.coupons:
+            self._coupon_lines.setdefault(coupon.id, []).append(first_line + len(items))
+            items.append(_coupon_line(self._updated_coupons.get(coupon.id, coupon)))
+            if coupon.market is not None:
+                self._add_runners(coupon.market, items, first_line)
+            self._add_event_markets(coupon.event_markets, items, first_line)
+        self._add_event_markets(card.event_markets, items, first_line)
+        return items
+
+    def _add_event_markets(self, event_markets: list[EventMarket], items: list[str], first_line: int):
+        for shown in event_markets:
+            items.append(_event_line(shown))
+            self._add_runners(shown.market, items, first_line)
+
+    def _add_runners(self, market: Market, items: list[str], first_line: int):
+        for runner in market.runners:
+            key = (market.market_id, runner.selection_id)
+            y = first_line + len(items)
+            self._runner_lines.setdefault(key, []).append(y)
+            self._line_prices[y] = self._ticked_prices[key] if key in self._ticked_prices else runner.price
+            items.append(_runner_indent + runner.name)
+
+    def rebind_tab(self, tab: Optional[Tab]):
+        # same cards and coupons from a newer layout; prices reach the lines through apply_prices
+        if self._tab is not None and tab is not None and tab.id == self._tab.id:
+            self._tab = tab
+            if isinstance(self._items, _TabLines):
+                self._items.rebind(tab.cards)
+
+    def update_coupons(self, coupons: dict[int, Coupon], coupon_ids: set[int]):
+        for coupon_id in coupon_ids:
+            if self._tab is None or coupon_id not in coupons:
+                continue
+            self._updated_coupons[coupon_id] = coupons[coupon_id]
+            line = _coupon_line(coupons[coupon_id])
+            for y in self._coupon_lines.get(coupon_id, ()):
+                if self._items[y] != line:
+                    self._set_item(y, line)
+
+    def apply_prices(self, prices: dict[PriceKey, Optional[Price]]):
+        now = self._clock()
+        for key, price in prices.items():
+            if self._tab is not None:
+                self._ticked_prices[key] = price
+            for y in self._runner_lines.get(key, ()):
+                previous = self._line_prices[y]
+                if previous == price:
+                    continue
+                self._line_prices[y] = price
+                rising = previous is not None and price is not None and price.decimal > previous.decimal
+                self._highlights[y] = (now, price_up_pair if rising else price_down_pair, 0)
+                self._draw_price(y)
+                due = now + _highlight_stages[0]
+                if self._next_highlight_change is None or due < self._next_highlight_change:
+                    self._next_highlight_change = due
+
+    def decay_highlights(self):
+        now = self._clock()
+        if self._next_highlight_change is None or now < self._next_highlight_change:
+            return
+        next_change = None
+        for y, (changed_at, pair, stage) in list(self._highlights.items()):
+            age = now - changed_at
+            new_stage = stage
+            while new_stage < len(_highlight_stages) and age >= _highlight_stages[new_stage]:
+                new_stage += 1
+            if new_stage != stage:
+                if new_stage == len(_highlight_stages):
+                    del self._highlights[y]
                 else:
-                    items.append("    " + coupon['type'] + " for event " + str(coupon['eventId']))
+                    self._highlights[y] = (changed_at, pair, new_stage)
+                self._draw_price(y)
+            if new_stage < len(_highlight_stages):
+                due = changed_at + _highlight_stages[new_stage]
+                next_change = due if next_change is None else min(next_change, due)
+        self._next_highlight_change = next_change
 
-        for i, item in enumerate(items):
-            self._menu_pad.addstr(i, 0, item)
-        self._pad_update_needed = True
+    def seconds_until_highlight_change(self) -> Optional[float]:
+        if self._next_highlight_change is None:
+            return None
+        return max(self._next_highlight_change - self._clock(), 0.0)
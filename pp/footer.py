@@ -1,7 +1,9 @@
 import curses
 from _curses import window
+from typing import Optional
 
-from pp.abstract_view import AbstractView
+from pp import screen
+from pp.abstract_view import AbstractView, DirtyRect
 
 _shortcuts = '[TAB] Change Focus    [q] Quit'
 _bet_slip = 'Bet Slip: 0 Bets (£0.00)'
@@ -10,19 +12,32 @@ _bet_slip = 'Bet Slip: 0 Bets (£0.00)'
 class FooterView(AbstractView):
     def __init__(self, max_rows, max_cols: int):
         # noinspection PyTypeChecker
-        self._footer_wnd: window = curses.newwin(1, max_cols, max_rows - 1, 0)
+        self._footer_wnd: window = screen.newwin(1, max_cols, max_rows - 1, 0)
+        self._trace_summary: Optional[str] = None
         self.update_needed = True
 
+    def show_trace_summary(self, summary: Optional[str]):
+        if summary != self._trace_summary:
+            self._trace_summary = summary
+            self.update_needed = True
+
     def full_render(self, max_rows: int, max_cols: int, is_focused: bool):
         self.update_render(max_rows, max_cols)
 
     def update_render(self, max_rows: int, max_cols: int):
         if self.update_needed:
             self.update_needed = False
-            self._footer_wnd.bkgd(' ', curses.color_pair(1))
-            self._footer_wnd.addstr(0, 1, _shortcuts)
+            self._footer_wnd.erase()
+            self._footer_wnd.bkgd(' ', screen.color_pair(1))
+            text = _shortcuts if self._trace_summary is None else self._trace_summary
+            self._footer_wnd.addnstr(0, 1, text, max(max_cols - 2, 0))
             self._footer_wnd.noutrefresh()
 
+    def dirty_region(self, max_rows: int, max_cols: int) -> Optional[DirtyRect]:
+        if not self.update_needed:
+            return None
+        return DirtyRect(max_rows - 1, 0, max_rows - 1, max_cols - 1)
+
     def on_change_focus(self, is_focused: bool):
         pass
 
@@ -31,5 +46,5 @@ class FooterView(AbstractView):
         self._footer_wnd.mvwin(max_rows - 1, 0)
         self.update_needed = True
 
-    def process_keystroke(self, key: int):
+    def process_keystroke(self, key: int, count: int = 1):
         pass
@@ -1,7 +1,9 @@
 import curses
 from _curses import window
+from typing import Optional
 
-from pp.abstract_view import AbstractView
+from pp import screen
+from pp.abstract_view import AbstractView, DirtyRect
 
 _title = 'PaddyCurses'
 _login_btn = 'Login [^L]'
@@ -10,7 +12,7 @@ _login_btn = 'Login [^L]'
 class HeaderView(AbstractView):
     def __init__(self, max_cols: int):
         # noinspection PyTypeChecker
-        self._header_wnd: window = curses.newwin(1, max_cols, 0, 0)
+        self._header_wnd: window = screen.newwin(1, max_cols, 0, 0)
         self.update_needed = True
 
     def full_render(self, max_rows: int, max_cols: int, is_focused: bool):
@@ -19,11 +21,16 @@ class HeaderView(AbstractView):
     def update_render(self, max_rows: int, max_cols: int):
         if self.update_needed:
             self.update_needed = False
-            self._header_wnd.bkgd(' ', curses.color_pair(1))
+            self._header_wnd.bkgd(' ', screen.color_pair(1))
             self._header_wnd.addstr(0, round(max_cols / 2 - len(_title) / 2), _title, curses.A_BOLD)
             self._header_wnd.addstr(0, max_cols - len(_login_btn) - 2, _login_btn)
             self._header_wnd.noutrefresh()
 
+    def dirty_region(self, max_rows: int, max_cols: int) -> Optional[DirtyRect]:
+        if not self.update_needed:
+            return None
+        return DirtyRect(0, 0, 0, max_cols - 1)
+
     def on_change_focus(self, is_focused: bool):
         pass
 
@@ -32,5 +39,5 @@ class HeaderView(AbstractView):
         self._header_wnd.erase()
         self.update_needed = True
 
-    def process_keystroke(self, key: int):
+    def process_keystroke(self, key: int, count: int = 1):
         pass
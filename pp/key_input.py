@@ -0,0 +1,31 @@
+import curses
+from _curses import window
+
+_repeatable_keys = {curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT, curses.KEY_PPAGE,
+                    curses.KEY_NPAGE}
+_max_batch_size = 256
+
+
+def read_key_batch(scr: window, timeout_ms: int) -> list[int]:
+    scr.timeout(timeout_ms)
+    key = scr.getch()
+    if key == -1:
+        return []
+    keys = [key]
+    scr.timeout(0)
+    while len(keys) < _max_batch_size:
+        key = scr.getch()
+        if key == -1:
+            break
+        keys.append(key)
+    return keys
+
+
+def coalesce_keys(keys: list[int]) -> list[tuple[int, int]]:
+    coalesced: list[tuple[int, int]] = []
+    for key in keys:
+        if coalesced and key in _repeatable_keys and coalesced[-1][0] == key:
+            coalesced[-1] = (key, coalesced[-1][1] + 1)
+        else:
+            coalesced.append((key, 1))
+    return coalesced
@@ -0,0 +1,254 @@
+from typing import Any, Iterable, Optional, Union
+
+TabId = Union[str, int]
+CardId = Union[str, int]
+event_card_types = ('INPLAY_FEATURED', 'INPLAY_AVB_EVENT')
+_card_titles = {'INPLAY_FEATURED': 'Featured'}
+
+
+class Price:
+    __slots__ = ('decimal', 'numerator', 'denominator')
+
+    def __init__(self, decimal: float, numerator: int, denominator: int):
+        self.decimal = decimal
+        self.numerator = numerator
+        self.denominator = denominator
+
+    def __eq__(self, other):
+        return isinstance(other, Price) and self.decimal == other.decimal \
+            and self.numerator == other.numerator and self.denominator == other.denominator
+
+    def fractional(self) -> str:
+        return str(self.numerator) + '/' + str(self.denominator)
+
+
+class Runner:
+    __slots__ = ('selection_id', 'name', 'status', 'price')
+
+    def __init__(self, selection_id: int, name: str, status: str, price: Optional[Price]):
+        self.selection_id = selection_id
+        self.name = name
+        self.status = status
+        self.price = price
+
+    def __eq__(self, other):
+        return isinstance(other, Runner) and self.selection_id == other.selection_id and self.name == other.name \
+            and self.status == other.status and self.price == other.price
+
+
+class Market:
+    __slots__ = ('market_id', 'name', 'status', 'runners', 'event_id', 'competition_id', 'event_type_id',
+                 'market_type', 'sort_priority')
+
+    def __init__(self, market_id: str, name: str, status: str, runners: list[Runner], event_id: Optional[int] = None,
+                 competition_id: Optional[int] = None, event_type_id: Optional[int] = None,
+                 market_type: Optional[str] = None, sort_priority: int = 0):
+        self.market_id = market_id
+        self.name = name
+        self.status = status
+        self.runners = runners
+        self.event_id = event_id
+        self.competition_id = competition_id
+        self.event_type_id = event_type_id
+        self.market_type = market_type
+        self.sort_priority = sort_priority
+
+    def __eq__(self, other):
+        return isinstance(other, Market) and self.market_id == other.market_id and self.name == other.name \
+            and self.status == other.status and self.runners == other.runners
+
+
+class Coupon:
+    __slots__ = ('id', 'type', 'title', 'event_id', 'market_id', 'market', 'event_markets')
+
+    def __init__(self, coupon_id: int, coupon_type: str, title: Optional[str], event_id: Optional[int],
+                 market_id: Optional[str], market: Optional[Market] = None,
+                 event_markets: Optional[list['EventMarket']] = None):
+        self.id = coupon_id
+        self.type = coupon_type
+        self.title = title
+        self.event_id = event_id
+        self.market_id = market_id
+        self.market = market
+        self.event_markets = event_markets if event_markets is not None else []
+
+    def __eq__(self, other):
+        return isinstance(other, Coupon) and self.id == other.id and self.type == other.type \
+            and self.title == other.title and self.event_id == other.event_id \
+            and self.market_id == other.market_id and self.market == other.market \
+            and self.event_markets == other.event_markets
+
+    def label(self) -> str:
+        if self.title is not None:
+            return self.title
+        return self.type + ' for event ' + str(self.event_id)
+
+
+class Event:
+    __slots__ = ('id', 'name', 'competition_id', 'competition')
+
+    def __init__(self, event_id: int, name: str, competition_id: Optional[int], competition: Optional[str]):
+        self.id = event_id
+        self.name = name
+        self.competition_id = competition_id
+        self.competition = competition
+
+    def __eq__(self, other):
+        return isinstance(other, Event) and self.id == other.id and self.name == other.name \
+            and self.competition_id == other.competition_id and self.competition == other.competition
+
+
+class EventMarket:
+    __slots__ = ('event', 'market')
+
+    def __init__(self, event: Event, market: Market):
+        self.event = event
+        self.market = market
+
+    def __eq__(self, other):
+        return isinstance(other, EventMarket) and self.event == other.event and self.market == other.market
+
+
+class Card:
+    __slots__ = ('id', 'title', 'coupon_ids', 'coupons', 'event_markets')
+
+    def __init__(self, card_id: CardId, title: str, coupon_ids: tuple[int, ...], coupons: list[Coupon],
+                 event_markets: Optional[list[EventMarket]] = None):
+        self.id = card_id
+        self.title = title
+        self.coupon_ids = coupon_ids
+        self.coupons = coupons
+        self.event_markets = event_markets if event_markets is not None else []
+
+    def __eq__(self, other):
+        # event market prices are compared per market, like coupons, so only which events show counts here
+        return isinstance(other, Card) and self.id == other.id and self.title == other.title \
+            and self.coupon_ids == other.coupon_ids \
+            and [(shown.event, shown.market.market_id) for shown in self.event_markets] \
+            == [(shown.event, shown.market.market_id) for shown in other.event_markets]
+
+
+class Tab:
+    __slots__ = ('id', 'title', 'card_ids', 'cards')
+
+    def __init__(self, tab_id: TabId, title: str, card_ids: tuple[CardId, ...] = (),
+                 cards: Optional[list[Card]] = None):
+        self.id = tab_id
+        self.title = title
+        self.card_ids = card_ids
+        self.cards = cards
+
+    def __eq__(self, other):
+        return isinstance(other, Tab) and self.id == other.id and self.title == other.title \
+            and self.card_ids == other.card_ids
+
+
+class MarketQuery:
+    """Which attached markets an events coupon or in-play card shows: one market per matching event."""
+    __slots__ = ('event_ids', 'competition_ids', 'event_type_id', 'market_types')
+
+    def __init__(self, event_ids: tuple[int, ...] = (), competition_ids: tuple[int, ...] = (),
+                 event_type_id: Optional[int] = None, market_types: tuple[str, ...] = ()):
+        self.event_ids = event_ids
+        self.competition_ids = competition_ids
+        self.event_type_id = event_type_id
+        self.market_types = market_types
+
+    def accepts(self, market: Market) -> bool:
+        return (self.event_type_id is None or market.event_type_id == self.event_type_id) \
+            and (not self.market_types or market.market_type in self.market_types)
+
+
+class MarketIndex:
+    def __init__(self, markets: Iterable[Market]):
+        self._by_event: dict[int, list[Market]] = {}
+        self._by_competition: dict[int, list[Market]] = {}
+        for market in sorted(markets, key=lambda m: m.sort_priority):
+            if market.event_id is None:
+                continue
+            self._by_event.setdefault(market.event_id, []).append(market)
+            if market.competition_id is not None:
+                self._by_competition.setdefault(market.competition_id, []).append(market)
+
+    def event_markets(self, query: MarketQuery, events: dict[int, Event]) -> list[EventMarket]:
+        chosen: dict[int, Market] = {}
+        for event_id in query.event_ids:
+            for market in self._by_event.get(event_id, ()):
+                if query.accepts(market):
+                    chosen.setdefault(event_id, market)
+                    break
+        for competition_id in query.competition_ids:
+            for market in self._by_competition.get(competition_id, ()):
+                if market.event_id not in chosen and query.accepts(market):
+                    chosen[market.event_id] = market
+        return [EventMarket(events[event_id], market) for event_id, market in chosen.items() if event_id in events]
+
+
+def card_id_from_json(card_id: Union[str, int]) -> CardId:
+    if isinstance(card_id, str) and not card_id.isdigit():
+        return card_id
+    return int(card_id)
+
+
+def price_from_json(odds: dict[str, Any]) -> Optional[Price]:
+    true_odds = odds.get('trueOdds')
+    if true_odds is None or 'decimalOdds' not in true_odds:
+        return None
+    fractional = true_odds.get('fractionalOdds', {})
+    return Price(decimal=true_odds['decimalOdds']['decimalOdds'],
+                 numerator=fractional.get('numerator', 0), denominator=fractional.get('denominator', 1))
+
+
+def market_from_json(market: dict[str, Any]) -> Market:
+    runners = [Runner(selection_id=runner['selectionId'], name=runner.get('runnerName', ''),
+                      status=runner.get('runnerStatus', ''), price=price_from_json(runner.get('winRunnerOdds', {})))
+               for runner in sorted(market.get('runners', []), key=lambda r: r.get('sortPriority', 0))]
+    return Market(market_id=market['marketId'], name=market.get('marketName', ''),
+                  status=market.get('marketStatus', ''), runners=runners, event_id=market.get('eventId'),
+                  competition_id=market.get('competitionId'), event_type_id=market.get('eventTypeId'),
+                  market_type=market.get('marketType'), sort_priority=market.get('sortPriority', 0))
+
+
+def coupon_market_query(coupon: dict[str, Any]) -> Optional[MarketQuery]:
+    if coupon.get('type') != 'EVENTS':
+        return None
+    return MarketQuery(event_ids=tuple(coupon.get('eventIds', ())),
+                       competition_ids=tuple(coupon.get('competitionIds', ())),
+                       event_type_id=coupon.get('eventTypeId'), market_types=tuple(coupon.get('marketTypes', ())[:1]))
+
+
+def card_market_query(card: dict[str, Any]) -> Optional[MarketQuery]:
+    if card.get('type') == 'INPLAY_FEATURED':
+        return MarketQuery(event_ids=tuple(item['eventId'] for item in card.get('content', ())
+                                           if item.get('type') == 'EVENT' and 'eventId' in item))
+    if card.get('type') == 'INPLAY_AVB_EVENT':
+        return MarketQuery(competition_ids=tuple(card.get('competitions', ())), event_type_id=card.get('eventTypeId'))
+    return None
+
+
+def coupon_from_json(coupon: dict[str, Any], markets: dict[str, Market], market_index: Optional[MarketIndex] = None,
+                     events: Optional[dict[int, Event]] = None) -> Coupon:
+    market_id = coupon.get('marketId')
+    query = coupon_market_query(coupon)
+    return Coupon(coupon_id=int(coupon['id']), coupon_type=coupon['type'], title=coupon.get('title'),
+                  event_id=coupon.get('eventId'), market_id=market_id,
+                  market=markets.get(market_id) if market_id is not None else None,
+                  event_markets=market_index.event_markets(query, events or {})
+                  if query is not None and market_index is not None else None)
+
+
+def event_from_json(event: dict[str, Any], competitions: dict[int, str]) -> Event:
+    competition_id = event.get('competitionId')
+    competition = competitions.get(competition_id) if competition_id is not None else None
+    return Event(event_id=int(event['eventId']), name=event.get('name', ''), competition_id=competition_id,
+                 competition=competition)
+
+
+def card_from_json(card: dict[str, Any], coupons: dict[int, Coupon], market_index: Optional[MarketIndex] = None,
+                   events: Optional[dict[int, Event]] = None) -> Card:
+    coupon_ids = tuple(int(coupon['id']) for coupon in card.get('coupons', []))
+    query = card_market_query(card)
+    return Card(card_id=card_id_from_json(card['id']), title=card.get('title', _card_titles.get(card.get('type'), '')),
+                coupon_ids=coupon_ids, coupons=[coupons[coupon_id] for coupon_id in coupon_ids if coupon_id in coupons],
+                event_markets=market_index.event_markets(query, events or {})
+                if query is not None and market_index is not None else None)
@@ -0,0 +1,96 @@
+import time
+from typing import Callable, Optional
+
+from pp import screen
+from pp.abstract_view import AbstractView, DirtyRect
+from pp.tracing import tracer
+
+
+class FrameStats:
+    def __init__(self):
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self.frames_deferred = 0
+        self.last_dirty_area = 0
+
+
+class RenderScheduler:
+    def __init__(self, max_frame_rate: float = 60.0, clock: Callable[[], float] = time.monotonic,
+                 flush: Callable[[], None] = screen.doupdate):
+        self._min_frame_interval = 1.0 / max_frame_rate
+        self._clock = clock
+        self._flush = flush
+        self._last_frame: Optional[float] = None
+        self._invalidated: Optional[DirtyRect] = None
+        self._deferred = False
+        self.stats = FrameStats()
+
+    def invalidate(self, rect: DirtyRect):
+        self._invalidated = rect if self._invalidated is None else self._invalidated.union(rect)
+
+    def invalidate_screen(self, max_rows: int, max_cols: int):
+        self.invalidate(DirtyRect(0, 0, max_rows - 1, max_cols - 1))
+
+    def render(self, views: dict[str, AbstractView], max_rows: int, max_cols: int) -> bool:
+        now = self._clock()
+        if self._last_frame is not None and now - self._last_frame < self._min_frame_interval:
+            self._deferred = True
+            self.stats.frames_deferred += 1
+            return False
+        self._deferred = False
+
+        dirty = self._invalidated
+        dirty_views = []
+        for view in views.values():
+            rect = view.dirty_region(max_rows, max_cols)
+            if rect is not None:
+                dirty_views.append(view)
+                dirty = rect if dirty is None else dirty.union(rect)
+        if dirty is None:
+            self.stats.frames_skipped += 1
+            return False
+
+        with tracer.span('render', 'ui'):
+            for view in dirty_views:
+                view.update_render(max_rows, max_cols)
+        with tracer.span('flush', 'ui'):
+            self._flush()
+        self._invalidated = None
+        self._last_frame = now
+        self.stats.frames_drawn += 1
+        self.stats.last_dirty_area = dirty.area
+        return True
+
+    def seconds_until_frame(self) -> Optional[float]:
+        if not self._deferred:
+            return None
+        return max(self._last_frame + self._min_frame_interval - self._clock(), 0.0)
+
+
+class ResizeDebouncer:
+    def __init__(self, settle_seconds: float = 0.1, clock: Callable[[], float] = time.monotonic):
+        self._settle_seconds = settle_seconds
+        self._clock = clock
+        self._due: Optional[float] = None
+        self.resizes_seen = 0
+        self.layouts_done = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._due is not None
+
+    def note_resize(self):
+        self._due = self._clock() + self._settle_seconds
+        self.resizes_seen += 1
+
+    def take_due(self) -> bool:
+        if self._due is None or self._clock() < self._due:
+            return False
+        self._due = None
+        self.layouts_done += 1
+        return True
+
+    def seconds_until_due(self) -> Optional[float]:
+        if self._due is None:
+            return None
+        return max(self._due - self._clock(), 0.0)
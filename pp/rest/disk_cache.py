@@ -0,0 +1,179 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, BinaryIO
+
+_stale_temp_seconds = 60 * 60.0
+
+
+class CachedResponse:
+    def __init__(self, body: memoryview, etag: Optional[str], last_modified: Optional[str], stored_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def revalidation_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class DiskCache:
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024, max_age: float = 7 * 24 * 60 * 60.0,
+                 clock: Callable[[], float] = time.time):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._clock = clock
+        self._sweep_lock = threading.Lock()
+        self._written_since_sweep: Optional[int] = None
+
+    def _path_for(self, key: str) -> Path:
+        return self._directory / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def load(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path_for(key), 'rb') as f:
+                # noinspection PyTypeChecker
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                stored_at = os.fstat(f.fileno()).st_mtime
+        except (OSError, ValueError):
+            return None
+
+        header_end = mapped.find(b'\n')
+        try:
+            header = json.loads(mapped[:header_end]) if header_end >= 0 else None
+        except ValueError:
+            header = None
+        if header is None or header.get('key') != key:
+            mapped.close()
+            return None
+        return CachedResponse(body=memoryview(mapped)[header_end + 1:], etag=header.get('etag'),
+                              last_modified=header.get('last_modified'), stored_at=stored_at)
+
+    def touch(self, key: str):
+        # a 304 confirms the entry again, so it ages from now
+        now = self._clock()
+        try:
+            os.utime(self._path_for(key), (now, now))
+        except OSError:
+            pass
+
+    def sweep(self):
+        # entries age by mtime, which commit() and touch() set from the clock
+        now = self._clock()
+        for path in self._directory.glob('*.tmp'):
+            try:
+                if path.stat().st_mtime < now - _stale_temp_seconds:
+                    _unlink(path)
+            except OSError:
+                continue
+
+        entries = []
+        for path in self._directory.glob('*.cache'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime < now - self._max_age:
+                _unlink(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self._max_bytes:
+                break
+            _unlink(path)
+            total_bytes -= size
+
+    def _sweep_if_due(self):
+        # once per process, then again after every eighth of max_bytes written
+        with self._sweep_lock:
+            written = self._written_since_sweep
+            if written is not None and written < self._max_bytes // 8:
+                return
+            self._written_since_sweep = 0
+        self.sweep()
+
+    def _committed(self, size: int):
+        with self._sweep_lock:
+            if self._written_since_sweep is not None:
+                self._written_since_sweep += size
+
+    def open_writer(self, key: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> Optional['CacheWriter']:
+        self._sweep_if_due()
+        header = json.dumps({'key': key, 'etag': etag, 'last_modified': last_modified})
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        except OSError:
+            return None
+        writer = CacheWriter(os.fdopen(fd, 'wb'), Path(temp_path), self._path_for(key), self._clock, self._committed)
+        writer.write(header.encode('utf-8') + b'\n')
+        return writer
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        writer = self.open_writer(key, etag, last_modified)
+        if writer is not None:
+            writer.write(body)
+            writer.commit()
+
+
+def _unlink(path: Path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class CacheWriter:
+    def __init__(self, file: BinaryIO, temp_path: Path, final_path: Path, clock: Callable[[], float] = time.time,
+                 on_commit: Optional[Callable[[int], None]] = None):
+        self._file = file
+        self._temp_path = temp_path
+        self._final_path = final_path
+        self._clock = clock
+        self._on_commit = on_commit
+        self._size = 0
+        self._failed = False
+
+    def write(self, data: bytes):
+        if self._failed:
+            return
+        try:
+            self._file.write(data)
+            self._size += len(data)
+        except OSError:
+            self._failed = True
+
+    def commit(self):
+        try:
+            self._file.close()
+            if not self._failed:
+                now = self._clock()
+                os.utime(self._temp_path, (now, now))
+                os.replace(self._temp_path, self._final_path)
+                if self._on_commit is not None:
+                    self._on_commit(self._size)
+                return
+        except OSError:
+            pass
+        self.discard()
+
+    def discard(self):
+        try:
+            self._file.close()
+            os.unlink(self._temp_path)
+        except OSError:
+            pass
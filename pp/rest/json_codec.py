@@ -0,0 +1,63 @@
+import json
+from typing import Any, Optional, Union
+
+Body = Union[bytes, memoryview]
+
+
+class StdlibJsonDecoder:
+    name = 'json'
+
+    def loads(self, data: Body) -> Any:
+        return json.loads(data if isinstance(data, bytes) else bytes(data))
+
+
+class OrjsonDecoder:
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+
+    def loads(self, data: Body) -> Any:
+        return self._loads(data)
+
+
+_decoder_types = {'orjson': OrjsonDecoder, 'json': StdlibJsonDecoder}
+_preferred_decoders = ('orjson', 'json')
+_decoder_name = 'auto'
+_decoder: Optional[Union[StdlibJsonDecoder, OrjsonDecoder]] = None
+
+
+def decoder_names() -> list[str]:
+    return list(_decoder_types.keys())
+
+
+def load_decoder(name: str = 'auto') -> Union[StdlibJsonDecoder, OrjsonDecoder]:
+    if name != 'auto':
+        if name not in _decoder_types:
+            raise ValueError('Unknown JSON decoder: ' + name)
+        return _decoder_types[name]()
+    for preferred in _preferred_decoders:
+        try:
+            return _decoder_types[preferred]()
+        except ImportError:
+            continue
+    return StdlibJsonDecoder()
+
+
+def use_decoder(name: str):
+    global _decoder_name, _decoder
+    _decoder_name = name
+    _decoder = None
+
+
+def current_decoder() -> Union[StdlibJsonDecoder, OrjsonDecoder]:
+    global _decoder
+    if _decoder is None:
+        _decoder = load_decoder(_decoder_name)
+    return _decoder
+
+
+def loads(data: Body) -> Any:
+    decoder = _decoder if _decoder is not None else current_decoder()
+    return decoder.loads(data)
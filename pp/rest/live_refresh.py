@@ -0,0 +1,81 @@
+import time
+from typing import Callable, Optional
+
+from pp.config import PPConfig
+from pp.model import Market
+from pp.rest.page_layout import PageLayout
+from pp.rest.page_loader import PageLoader
+from pp.rest.price_stream import PriceTick
+
+
+class LayoutDiff:
+    def __init__(self, structure_changed: bool, changed_coupons: set[int],
+                 price_ticks: Optional[list[PriceTick]] = None):
+        self.structure_changed = structure_changed
+        self.changed_coupons = changed_coupons
+        self.price_ticks = price_ticks if price_ticks is not None else []
+
+
+def _runner_ids(market: Market) -> list[int]:
+    return [runner.selection_id for runner in market.runners]
+
+
+def diff_layouts(old: PageLayout, new: PageLayout) -> LayoutDiff:
+    if old.default_tab != new.default_tab or old.cards != new.cards or old.tabs != new.tabs \
+            or old.coupons.keys() - new.coupons.keys():
+        return LayoutDiff(structure_changed=True, changed_coupons=set())
+
+    old_markets, new_markets = old.displayed_markets(), new.displayed_markets()
+    if old_markets.keys() != new_markets.keys():
+        return LayoutDiff(structure_changed=True, changed_coupons=set())
+
+    price_ticks = []
+    for market_id, new_market in new_markets.items():
+        old_market = old_markets[market_id]
+        if old_market is new_market:
+            continue
+        if _runner_ids(old_market) != _runner_ids(new_market):
+            return LayoutDiff(structure_changed=True, changed_coupons=set())
+        for old_runner, new_runner in zip(old_market.runners, new_market.runners):
+            if old_runner.price != new_runner.price:
+                price_ticks.append(PriceTick(market_id, new_runner.selection_id, new_runner.price))
+
+    changed_coupons = {coupon_id for coupon_id, coupon in new.coupons.items()
+                       if old.coupons.get(coupon_id) != coupon}
+    return LayoutDiff(structure_changed=False, changed_coupons=changed_coupons, price_ticks=price_ticks)
+
+
+class LiveRefresher:
+    def __init__(self, loader: PageLoader, config: PPConfig, clock: Callable[[], float] = time.monotonic):
+        self._loader = loader
+        self._intervals = config.live_refresh_intervals
+        self._clock = clock
+        self._page: Optional[str] = None
+        self._snapshot: Optional[PageLayout] = None
+        self._next_due: Optional[float] = None
+
+    def is_watching(self, page: str) -> bool:
+        return self._page == page and self._snapshot is not None
+
+    def watch(self, page: str, layout: PageLayout):
+        self._page = page
+        self._snapshot = layout
+        interval = self._intervals.get(page)
+        self._next_due = self._clock() + interval if interval is not None else None
+
+    def diff(self, layout: PageLayout) -> LayoutDiff:
+        return diff_layouts(self._snapshot, layout)
+
+    def tick(self):
+        if self._next_due is None or self._clock() < self._next_due:
+            return
+        if self._loader.current_page != self._page:
+            self._next_due = None
+            return
+        self._next_due = self._clock() + self._intervals[self._page]
+        self._loader.refresh(self._page)
+
+    def seconds_until_due(self) -> Optional[float]:
+        if self._next_due is None:
+            return None
+        return max(self._next_due - self._clock(), 0.0)
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from pp.config import PPConfig
+from pp.rest.page_layout import PageLayout
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __repr__(self):
+        return f'CacheStats(hits={self.hits}, stale_hits={self.stale_hits}, ' \
+               f'misses={self.misses}, evictions={self.evictions})'
+
+
+class _CacheEntry:
+    __slots__ = ('layout', 'size', 'expires_at')
+
+    def __init__(self, layout: PageLayout, size: int, expires_at: float):
+        self.layout = layout
+        self.size = size
+        self.expires_at = expires_at
+
+
+class PageCache:
+    def __init__(self, config: PPConfig, clock: Callable[[], float] = time.monotonic):
+        self._max_bytes = config.page_cache_max_bytes
+        self._default_ttl = config.default_page_ttl
+        self._page_ttls = config.page_ttls
+        self._clock = clock
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._total_bytes: int = 0
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> tuple[Optional[PageLayout], bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if self._clock() < entry.expires_at:
+                self.stats.hits += 1
+                return entry.layout, True
+            self.stats.stale_hits += 1
+            return entry.layout, False
+
+    def peek(self, key: str) -> Optional[PageLayout]:
+        # a fresh layout without counting a lookup, for re-checks of a key already looked up
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.layout if entry is not None and self._clock() < entry.expires_at else None
+
+    def is_fresh(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self._clock() < entry.expires_at
+
+    def store(self, page: str, key: str, layout: PageLayout):
+        size = max(layout.size, 1)
+        if size > self._max_bytes:
+            return
+        expires_at = self._clock() + self._page_ttls.get(page, self._default_ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CacheEntry(layout, size, expires_at)
+            self._total_bytes += size
+            while self._total_bytes > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
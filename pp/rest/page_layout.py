@@ -1,25 +1,72 @@
-import json
+import threading
 import time
+from itertools import chain
 from pathlib import Path
 from random import uniform
-from typing import Any, Union
-from urllib.parse import urlencode
-
-import requests
+from typing import Any, Union, Optional, Iterator, Iterable, TYPE_CHECKING
 
 from pp.config import PPConfig
+from pp.model import Tab, TabId, Card, CardId, Coupon, Event, Market, MarketIndex, market_from_json, \
+    coupon_from_json, card_from_json, card_id_from_json, event_card_types, event_from_json
+from pp.rest import json_codec
+from pp.rest.disk_cache import DiskCache
+from pp.rest.page_registry import PageRequest, build_page_registry
+from pp.rest.stream_parse import stream_layout
+from pp.tracing import tracer
+
+if TYPE_CHECKING:
+    import requests
+    from pp.rest.replay import Recorder
+
+Body = Union[bytes, memoryview]
+_chunk_size = 64 * 1024
 
 
 class PageLayout:
-    def __init__(self, tabs: list[dict[str, Union[str, int, list[int]]]], default_tab: int,
-                 page_info: dict[str, Union[str, int]], cards: dict[int, dict[Any]]):
+    __slots__ = ('tabs', 'default_tab', 'page_info', 'cards', 'coupons', 'events', 'competitions', 'size',
+                 '_tabs_by_id')
+
+    def __init__(self, tabs: list[Tab], default_tab: TabId, page_info: dict[str, Union[str, int]],
+                 cards: dict[CardId, Card], coupons: Optional[dict[int, Coupon]] = None,
+                 events: Optional[dict[int, Event]] = None, competitions: Optional[dict[int, str]] = None,
+                 size: int = 0):
         self.tabs = tabs
         self.default_tab = default_tab
         self.page_info = page_info
         self.cards = cards
+        self.coupons = coupons if coupons is not None else {}
+        self.events = events if events is not None else {}
+        self.competitions = competitions if competitions is not None else {}
+        self.size = size
+        self._tabs_by_id = {tab.id: tab for tab in tabs}
+
+    def tab(self, tab_id: Optional[TabId]) -> Optional[Tab]:
+        tab = self._tabs_by_id.get(tab_id)
+        if tab is not None and tab.cards is None:
+            with tracer.span('fill_tab', 'parse', tab=tab_id):
+                tab.cards = [self.cards[card_id] for card_id in tab.card_ids if card_id in self.cards]
+        return tab
+
+    def displayed_markets(self) -> dict[str, Market]:
+        markets = {}
+        for coupon in self.coupons.values():
+            if coupon.market is not None:
+                markets[coupon.market.market_id] = coupon.market
+            for shown in coupon.event_markets:
+                markets[shown.market.market_id] = shown.market
+        for card in self.cards.values():
+            for shown in card.event_markets:
+                markets[shown.market.market_id] = shown.market
+        return markets
 
 
-def load_mocked_page(page: str) -> dict:
+def iter_chunks(body: Body) -> Iterator[memoryview]:
+    view = memoryview(body)
+    for start in range(0, len(view), _chunk_size):
+        yield view[start:start + _chunk_size]
+
+
+def load_mocked_page(page: str) -> bytes:
     if page == 'HOMEPAGE':
         file = 'homepage.json'
     elif page == 'IN-PLAY':
@@ -28,11 +75,9 @@ def load_mocked_page(page: str) -> dict:
         file = 'football.json'
     else:
         raise Exception('Tried to load unknown mocked page: ' + page)
-    with open(Path(__file__).parent / 'mock_data' / file, 'r') as f:
-        json_data = json.load(f)
     time.sleep(uniform(0.045, 0.2))
-
-    return json_data
+    with open(Path(__file__).parent / 'mock_data' / file, 'rb') as f:
+        return f.read()
 
 
 config = PPConfig()
@@ -46,92 +91,229 @@ default_strands_keys = {
     'timezone': config.timezone,
     'exchangeLocale': config.locale
 }
+page_registry = build_page_registry(default_strands_keys)
+disk_cache = DiskCache(Path(config.cache_dir), config.disk_cache_max_bytes, config.disk_cache_max_age)
+json_codec.use_decoder(config.json_decoder)
+_recorder: Optional['Recorder'] = None
+_session: Optional['requests.Session'] = None
+_session_lock = threading.Lock()
 
 
-def query_string_ified(value: Any) -> str:
-    if isinstance(value, str):
-        return value
-    if isinstance(value, bool):
-        return str(value).lower()
-    else:
-        return str(value)
+class TransferStats:
+    def __init__(self):
+        self.responses = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.encodings: dict[str, int] = {}
+        self._lock = threading.Lock()
 
+    def record(self, encoding: str, wire_bytes: int, body_bytes: int):
+        with self._lock:
+            self.responses += 1
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
 
-def make_strands_request(slug: str, custom_options: dict[str, Any]) -> dict:
-    clean = {key: query_string_ified(value) for key, value in {**default_strands_keys, **custom_options}.items()}
-    query_string = urlencode(clean)
-    response = requests.get(
-        headers={'User-Agent': None, 'Accept': 'application/json'},
-        url="https://strands.paddypower.com/sdspp/" + slug + "/v3?" + query_string
-    ).json()
-    return response
 
+transfer_stats = TransferStats()
 
-def load_real_page(page: str) -> dict:
-    if page == 'HOMEPAGE':
-        custom_options = {
-            'cardsLimit': 1,
-            'includeMarketBlurbs': True,
-            'includePrices': True,
-            'includeRaceCards': True,
-            'includeStaticCards': True,
-            'nextRacesMarketsLimit': 3,
-            'page': page,
-            'priceHistory': 3
-        }
-        return make_strands_request('content-managed-page', custom_options)
-    if page == 'IN-PLAY':
-        custom_options = {
-            'comingUpTimeRange': 360_000,
-            'includeStaticCards': True,
-            'includeTabs': True
-        }
-        return make_strands_request('in-play', custom_options)
-    if page == 'FOOTBALL':
-        custom_options = {
-            'cardsLimit': 1,
-            'eventTypeId': 1,
-            'includeMarketBlurbs': True,
-            'includePrices': True,
-            'includeRaceCards': True,
-            'includeStaticCards': True,
-            'nextRacesMarketsLimit': 3,
-            'page': 'SPORT',
-            'priceHistory': 3
-        }
-        return make_strands_request('content-managed-page', custom_options)
-    else:
+
+def page_recorder() -> Optional['Recorder']:
+    global _recorder
+    if config.record_dir is None:
+        return None
+    with _session_lock:
+        if _recorder is None:
+            from pp.rest.replay import FixtureStore, Recorder
+            _recorder = Recorder(FixtureStore(Path(config.record_dir)))
+        return _recorder
+
+
+def strands_session() -> 'requests.Session':
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.request import ACCEPT_ENCODING
+            from urllib3.util.retry import Retry
+            retry = Retry(total=config.http_retries, backoff_factor=config.http_backoff_factor,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.http_pool_size, max_retries=retry)
+            session = requests.Session()
+            session.headers.update({'User-Agent': None, 'Accept': 'application/json',
+                                    'Accept-Encoding': ACCEPT_ENCODING})
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def make_strands_request(request: PageRequest) -> Iterator[Body]:
+    cache_key = request.cache_key
+    cached = disk_cache.load(cache_key)
+    headers = cached.revalidation_headers() if cached is not None else {}
+
+    with tracer.span('http_get', 'net', slug=request.slug):
+        response = strands_session().get(
+            headers=headers,
+            url=config.strands_base_url + request.slug + "/v3?" + request.query_string,
+            timeout=(config.http_connect_timeout, config.http_read_timeout),
+            stream=True
+        )
+    with response:
+        if response.status_code == 304 and cached is not None:
+            disk_cache.touch(cache_key)
+            yield from iter_chunks(cached.body)
+            return
+        response.raise_for_status()
+        writer = disk_cache.open_writer(cache_key, etag=response.headers.get('ETag'),
+                                        last_modified=response.headers.get('Last-Modified'))
+        body_bytes = 0
+        try:
+            for chunk in response.iter_content(chunk_size=_chunk_size):
+                body_bytes += len(chunk)
+                if writer is not None:
+                    writer.write(chunk)
+                yield chunk
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+        if writer is not None:
+            writer.commit()
+        transfer_stats.record(response.headers.get('Content-Encoding', 'identity'), wire_bytes(response, body_bytes),
+                              body_bytes)
+
+
+def wire_bytes(response: 'requests.Response', body_bytes: int) -> int:
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return body_bytes
+
+
+def page_request(page: str) -> PageRequest:
+    request = page_registry.get(page)
+    if request is None:
         raise Exception('Tried to load an unknown page: ' + page)
+    return request
+
+
+def page_cache_key(page: str) -> str:
+    request = page_registry.get(page)
+    if request is None:
+        return page
+    return page + ':' + request.cache_key
+
+
+def load_real_page(page: str) -> Iterator[Body]:
+    request = page_request(page)
+    chunks = make_strands_request(request)
+    recorder = page_recorder()
+    if recorder is not None:
+        return recorder.record(request.slug, request.query_string, chunks)
+    return chunks
 
 
-def build_tab(cards, coupons, tab):
-    tab_cards = [cards[int(x['id'])] for x in tab['cards']
-                 if isinstance(x['id'], int) and int(x['id']) in cards.keys()]
+def load_cached_body(page: str) -> Optional[Body]:
+    if config.mocked:
+        return None
+    request = page_registry.get(page)
+    if request is None:
+        return None
+    cached = disk_cache.load(request.cache_key)
+    if cached is None:
+        return None
+    return cached.body
 
-    tab_coupons = {coupon['id']: coupons[coupon['id']] for sublist in
-                   [card['coupons'] for card in tab_cards] for coupon in sublist}
 
-    return {'title': tab['title'],
-            'id': int(tab['id']),
-            'cards': tab_cards,
-            'coupons': tab_coupons}
+def load_cached_page(page: str) -> Optional[PageLayout]:
+    body = load_cached_body(page)
+    if body is None:
+        return None
+    return parse_page(body)
 
 
-def load_page(page: str, mocked: bool = True) -> PageLayout:
+def tab_id_from_json(tab_id: Union[str, int]) -> Union[str, int]:
+    if isinstance(tab_id, str) and not tab_id.isdigit():
+        return tab_id
+    return int(tab_id)
+
+
+def build_tab(tab: dict[str, Any]) -> Tab:
+    return Tab(tab_id=tab_id_from_json(tab['id']), title=tab['title'],
+               card_ids=tuple(card_id_from_json(card['id']) for card in tab['cards']))
+
+
+def load_page(page: str, mocked: Optional[bool] = None) -> PageLayout:
+    if mocked is None:
+        mocked = config.mocked
     if mocked:
-        json_data = load_mocked_page(page)
-    else:
-        json_data = load_real_page(page)
+        return parse_page(load_mocked_page(page))
+    return parse_network_page(load_real_page(page))
+
+
+def load_page_body(page: str, mocked: Optional[bool] = None) -> Body:
+    if mocked is None:
+        mocked = config.mocked
+    if mocked:
+        return load_mocked_page(page)
+    return b''.join(load_real_page(page))
+
+
+def parse_network_page(chunks: Iterable[Body], min_stream_bytes: Optional[int] = None) -> PageLayout:
+    # bench_parse: the stream parser takes 2-3.5x the CPU of a full parse for half its peak memory
+    # (1.2 MiB: 12 ms / 4.3 MiB full, 38 ms / 2.3 MiB stream). Below stream_parse_min_bytes the memory saved is
+    # too small to pay for that, so the usual 85-410 KiB pages are joined and parsed in one go
+    if min_stream_bytes is None:
+        min_stream_bytes = config.stream_parse_min_bytes
+    chunks = iter(chunks)
+    head: list[Body] = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_stream_bytes:
+            return parse_page_stream(chain(head, chunks))
+    return parse_page(b''.join(head))
+
+
+def parse_page_stream(chunks: Iterable[Body]) -> PageLayout:
+    with tracer.span('stream_parse', 'parse'):
+        json_data, size = stream_layout(chunks)
+    with tracer.span('build_layout', 'parse'):
+        return build_layout(json_data, size)
+
+
+def parse_page(body: Body) -> PageLayout:
+    with tracer.span('json_loads', 'parse'):
+        json_data = json_codec.loads(body)
+    with tracer.span('build_layout', 'parse'):
+        return build_layout(json_data, len(body))
+
 
-    cards = {int(card_id): x for card_id, x in json_data['layout']['cards'].items() if x['type'] == 'COUPON'}
-    coupons = {int(coupon_id): x for coupon_id, x in json_data['layout']['coupons'].items()} \
-        if 'coupons' in json_data['layout'] else {}
+def build_layout(json_data: dict[str, Any], size: int) -> PageLayout:
+    attachments = json_data.get('attachments', {})
+    markets = {market_id: market_from_json(market) for market_id, market in attachments.get('markets', {}).items()}
+    competitions = {int(competition_id): competition.get('name', '')
+                    for competition_id, competition in attachments.get('competitions', {}).items()}
+    events = {int(event_id): event_from_json(event, competitions)
+              for event_id, event in attachments.get('events', {}).items()}
+    market_index = MarketIndex(markets.values())
+    coupons = {int(coupon_id): coupon_from_json(x, markets, market_index, events)
+               for coupon_id, x in json_data['layout']['coupons'].items()} if 'coupons' in json_data['layout'] else {}
+    cards = {card_id_from_json(card_id): card_from_json(x, coupons, market_index, events)
+             for card_id, x in json_data['layout']['cards'].items()
+             if x['type'] == 'COUPON' or x['type'] in event_card_types}
 
-    tabs_with_ids = [build_tab(cards, coupons, json_data['layout']['tabs'][str(tab_id)])
-                     for tab_id in json_data['layout']['tabsDisplayOrder']
-                     if 'type' not in json_data['layout']['tabs'][str(tab_id)].keys() or
-                     json_data['layout']['tabs'][str(tab_id)]['type'] == 'TAB']
+    with tracer.span('build_tabs', 'parse'):
+        tabs = [build_tab(json_data['layout']['tabs'][str(tab_id)])
+                for tab_id in json_data['layout']['tabsDisplayOrder']
+                if 'type' not in json_data['layout']['tabs'][str(tab_id)].keys() or
+                json_data['layout']['tabs'][str(tab_id)]['type'] == 'TAB']
 
-    layout = PageLayout(tabs=tabs_with_ids, default_tab=json_data['layout']['defaultTab'],
-                        page_info=json_data['layout']['page'], cards=cards)
+    layout = PageLayout(tabs=tabs, default_tab=tab_id_from_json(json_data['layout']['defaultTab']),
+                        page_info=json_data['layout']['page'], cards=cards, coupons=coupons, events=events,
+                        competitions=competitions, size=size)
     return layout
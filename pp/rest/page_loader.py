@@ -0,0 +1,152 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional, Iterable
+
+from pp.rest import page_layout
+from pp.rest.page_cache import PageCache
+from pp.rest.page_layout import PageLayout
+from pp.rest.request_coordinator import BACKGROUND, INTERACTIVE, RequestBudget, RequestCoordinator
+from pp.tracing import tracer
+
+
+class LoadResult:
+    def __init__(self, page: str, generation: int, layout: Optional[PageLayout] = None,
+                 error: Optional[Exception] = None, is_refresh: bool = False, is_final: bool = True):
+        self.page = page
+        self.generation = generation
+        self.layout = layout
+        self.error = error
+        self.is_refresh = is_refresh
+        self.is_final = is_final
+
+
+def default_coordinator() -> RequestCoordinator:
+    config = page_layout.config
+    budget = RequestBudget(config.request_rate, config.request_burst) if config.request_rate > 0 else None
+    return RequestCoordinator(budget)
+
+
+class PageLoader:
+    def __init__(self, load: Callable[[str], PageLayout] = page_layout.load_page,
+                 load_cached: Callable[[str], Optional[PageLayout]] = page_layout.load_cached_page,
+                 cache: Optional[PageCache] = None, max_workers: int = 4,
+                 coordinator: Optional[RequestCoordinator] = None):
+        self._load = load
+        self._load_cached = load_cached
+        self.cache = cache if cache is not None else PageCache(page_layout.config)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='page-loader')
+        self._results: queue.SimpleQueue[LoadResult] = queue.SimpleQueue()
+        self._loaded: queue.SimpleQueue[tuple[str, PageLayout]] = queue.SimpleQueue()
+        self._generation: int = 0
+        self._in_flight: int = 0
+        self.coordinator = coordinator if coordinator is not None else default_coordinator()
+        self.current_page: Optional[str] = None
+
+    def request(self, page: str) -> int:
+        self._generation += 1
+        self.current_page = page
+        key = page_layout.page_cache_key(page)
+        cached, is_fresh = self.cache.lookup(key)
+        if cached is not None:
+            self._in_flight += 1
+            self._results.put(LoadResult(page, self._generation, layout=cached))
+        if not is_fresh:
+            self._in_flight += 1
+            self._executor.submit(self._run, page, key, self._generation, cached is not None, INTERACTIVE)
+        return self._generation
+
+    def leave_page(self):
+        self._generation += 1
+        self.current_page = None
+
+    def refresh(self, page: str):
+        self._in_flight += 1
+        self._executor.submit(self._run, page, page_layout.page_cache_key(page), self._generation, True, BACKGROUND)
+
+    def prefetch(self, pages: Iterable[str]) -> list[Future]:
+        scheduled = []
+        for page in pages:
+            key = page_layout.page_cache_key(page)
+            if self.cache.is_fresh(key):
+                continue
+            future, is_owner = self.coordinator.join(key, BACKGROUND)
+            if not is_owner:
+                continue
+            self._start_fetch(future, page, key)
+            scheduled.append(future)
+        return scheduled
+
+    def cancel_prefetch(self, page: str) -> bool:
+        return self.coordinator.cancel(page_layout.page_cache_key(page))
+
+    def _run(self, page: str, key: str, generation: int, is_refresh: bool, priority: int):
+        if not is_refresh:
+            is_refresh = self._emit_cached_copy(page, generation)
+        if priority == INTERACTIVE:
+            # a prefetch may have stored the page since request() counted its lookup
+            cached = self.cache.peek(key)
+            if cached is not None:
+                self._results.put(LoadResult(page, generation, layout=cached, is_refresh=is_refresh))
+                return
+        future, is_owner = self.coordinator.join(key, priority)
+        if is_owner:
+            self._start_fetch(future, page, key)
+        future.add_done_callback(lambda done: self._results.put(self._load_result(done, page, generation, is_refresh)))
+
+    @staticmethod
+    def _load_result(future: Future, page: str, generation: int, is_refresh: bool) -> LoadResult:
+        try:
+            return LoadResult(page, generation, layout=future.result(), is_refresh=is_refresh)
+        except Exception as e:
+            return LoadResult(page, generation, error=e, is_refresh=is_refresh)
+
+    def _start_fetch(self, future: Future, page: str, key: str):
+        self.coordinator.start(key, future, lambda: self._load_and_store(page, key), self._executor.submit)
+
+    def _load_and_store(self, page: str, key: str) -> PageLayout:
+        with tracer.span('load_page', 'net', page=page):
+            layout = self._load(page)
+        self.cache.store(page, key, layout)
+        self._loaded.put((page, layout))
+        return layout
+
+    def _emit_cached_copy(self, page: str, generation: int) -> bool:
+        try:
+            layout = self._load_cached(page)
+        except Exception:
+            return False
+        if layout is None:
+            return False
+        self._loaded.put((page, layout))
+        self._results.put(LoadResult(page, generation, layout=layout, is_final=False))
+        return True
+
+    def has_pending(self) -> bool:
+        return self._in_flight > 0
+
+    def completed(self) -> list[LoadResult]:
+        results = []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return results
+            if result.is_final:
+                self._in_flight -= 1
+            if result.generation != self._generation:
+                continue
+            if result.error is not None and result.is_refresh:
+                continue
+            results.append(result)
+
+    def loaded_pages(self) -> list[tuple[str, PageLayout]]:
+        pages = []
+        while True:
+            try:
+                pages.append(self._loaded.get_nowait())
+            except queue.Empty:
+                return pages
+
+    def shutdown(self):
+        self.coordinator.shutdown()
+        self._executor.shutdown(wait=False, cancel_futures=True)
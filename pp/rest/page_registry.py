@@ -0,0 +1,105 @@
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+# Betfair event type ids behind each A-Z sport; None where the sport has no strands SPORT page
+sport_event_types: dict[str, Optional[int]] = {
+    'AMERICAN FOOTBALL': 6423,
+    'AUSTRALIAN RULES': 61420,
+    'BASEBALL': 7511,
+    'BASKETBALL': 7522,
+    'BOXING': 6,
+    'CRICKET': 4,
+    'CURRENT AFFAIRS': None,
+    'CYCLING': 11,
+    'DARTS': 3503,
+    'ESPORTS': 27454571,
+    'FOOTBALL': 1,
+    'GAELIC GAMES': 2152880,
+    'GOLF': 3,
+    'GREYHOUND RACING': 4339,
+    'HANDBALL': 468328,
+    'HORSE RACING': 7,
+    'ICE HOCKEY': 7524,
+    'LOTTERIES': None,
+    'MIXED MARTIAL ARTS': 26420387,
+    'MOTOR SPORT': 8,
+    'POLITICS': 2378961,
+    'POOL': 72382,
+    'RUGBY LEAGUE': 1477,
+    'RUGBY UNION': 5,
+    'SNOOKER': 6422,
+    'SPECIAL BETS': 10,
+    'TABLE TENNIS': 2593174,
+    'TENNIS': 2,
+    'VIRTUAL SPORTS': None,
+    'VOLLEYBALL': 998917,
+    'WINTER SPORTS': 451485,
+}
+
+_content_page_options = {
+    'cardsLimit': 1,
+    'includeMarketBlurbs': True,
+    'includePrices': True,
+    'includeRaceCards': True,
+    'includeStaticCards': True,
+    'nextRacesMarketsLimit': 3,
+    'priceHistory': 3
+}
+
+
+def query_string_ified(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return str(value).lower()
+    else:
+        return str(value)
+
+
+def encode_options(options: dict[str, Any]) -> str:
+    return urlencode({key: query_string_ified(value) for key, value in options.items()})
+
+
+class PageRequest:
+    __slots__ = ('page', 'slug', 'custom_options', 'query_string', 'cache_key')
+
+    def __init__(self, page: str, slug: str, custom_options: dict[str, Any], default_query_string: str):
+        self.page = page
+        self.slug = slug
+        self.custom_options = custom_options
+        custom_query_string = encode_options(custom_options)
+        self.query_string = default_query_string + '&' + custom_query_string if custom_query_string \
+            else default_query_string
+        self.cache_key = slug + '?' + self.query_string
+
+
+def _page_definitions() -> dict[str, tuple[str, dict[str, Any]]]:
+    definitions = {
+        'HOMEPAGE': ('content-managed-page', {
+            'cardsLimit': 1,
+            'includeMarketBlurbs': True,
+            'includePrices': True,
+            'includeRaceCards': True,
+            'includeStaticCards': True,
+            'nextRacesMarketsLimit': 3,
+            'page': 'HOMEPAGE',
+            'priceHistory': 3
+        }),
+        'IN-PLAY': ('in-play', {
+            'comingUpTimeRange': 360_000,
+            'includeStaticCards': True,
+            'includeTabs': True
+        }),
+    }
+    for page, event_type_id in sport_event_types.items():
+        if event_type_id is None:
+            continue
+        options = {**_content_page_options, 'eventTypeId': event_type_id, 'page': 'SPORT'}
+        definitions[page] = ('content-managed-page', dict(sorted(options.items())))
+    return definitions
+
+
+def build_page_registry(default_strands_keys: dict[str, Any]) -> dict[str, PageRequest]:
+    default_query_string = encode_options(default_strands_keys)
+    return {page: PageRequest(page, slug, custom_options, default_query_string)
+            for page, (slug, custom_options) in _page_definitions().items()}
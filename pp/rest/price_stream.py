@@ -0,0 +1,118 @@
+import bisect
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from pp.model import Price
+from pp.rest.page_layout import PageLayout
+
+PriceKey = tuple[str, int]
+_fractional_ladder = ((1, 5), (2, 9), (1, 4), (2, 7), (1, 3), (4, 11), (2, 5), (4, 9), (1, 2), (8, 15), (4, 7),
+                      (8, 13), (4, 6), (8, 11), (4, 5), (5, 6), (10, 11), (1, 1), (11, 10), (6, 5), (5, 4), (11, 8),
+                      (6, 4), (13, 8), (7, 4), (15, 8), (2, 1), (9, 4), (5, 2), (11, 4), (3, 1), (10, 3), (7, 2),
+                      (4, 1), (9, 2), (5, 1), (11, 2), (6, 1), (13, 2), (7, 1), (15, 2), (8, 1), (17, 2), (9, 1),
+                      (10, 1), (11, 1), (12, 1), (14, 1), (16, 1), (18, 1), (20, 1), (25, 1), (33, 1), (40, 1),
+                      (50, 1), (66, 1), (80, 1), (100, 1))
+_ladder_decimals = [1 + numerator / denominator for numerator, denominator in _fractional_ladder]
+
+
+class PriceTick:
+    __slots__ = ('market_id', 'selection_id', 'price')
+
+    def __init__(self, market_id: str, selection_id: int, price: Optional[Price]):
+        self.market_id = market_id
+        self.selection_id = selection_id
+        self.price = price
+
+
+class StreamStats:
+    def __init__(self):
+        self.ticks_received = 0
+        self.ticks_coalesced = 0
+        self.drains = 0
+
+
+class PriceStream:
+    def __init__(self):
+        self._pending: dict[PriceKey, Optional[Price]] = {}
+        self._lock = threading.Lock()
+        self.stats = StreamStats()
+
+    def push(self, tick: PriceTick):
+        with self._lock:
+            key = (tick.market_id, tick.selection_id)
+            if key in self._pending:
+                self.stats.ticks_coalesced += 1
+            self._pending[key] = tick.price
+            self.stats.ticks_received += 1
+
+    def push_all(self, ticks: list[PriceTick]):
+        for tick in ticks:
+            self.push(tick)
+
+    def has_pending(self) -> bool:
+        return len(self._pending) > 0
+
+    def drain(self) -> dict[PriceKey, Optional[Price]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if pending:
+                self.stats.drains += 1
+        return pending
+
+
+def ladder_index(decimal: float) -> int:
+    return min(bisect.bisect_left(_ladder_decimals, decimal), len(_ladder_decimals) - 1)
+
+
+def ladder_price(index: int) -> Price:
+    numerator, denominator = _fractional_ladder[index]
+    return Price(decimal=round(_ladder_decimals[index], 2), numerator=numerator, denominator=denominator)
+
+
+class SimulatedPriceFeed:
+    def __init__(self, stream: PriceStream, ticks_per_second: float, seed: Optional[int] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._stream = stream
+        self._interval = 1.0 / ticks_per_second
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._prices: dict[PriceKey, int] = {}
+        self._keys: list[PriceKey] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, layout: PageLayout):
+        prices = {}
+        for market in layout.displayed_markets().values():
+            for runner in market.runners:
+                if runner.price is not None:
+                    prices[(market.market_id, runner.selection_id)] = ladder_index(runner.price.decimal)
+        with self._lock:
+            self._prices = prices
+            self._keys = list(prices.keys())
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='price-feed', daemon=True)
+            self._thread.start()
+
+    def _next_tick(self) -> Optional[PriceTick]:
+        with self._lock:
+            if not self._keys:
+                return None
+            key = self._keys[self._random.randrange(len(self._keys))]
+            index = self._prices[key] + self._random.choice((-2, -1, 1, 2))
+            index = min(max(index, 0), len(_fractional_ladder) - 1)
+            self._prices[key] = index
+        return PriceTick(key[0], key[1], ladder_price(index))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            tick = self._next_tick()
+            if tick is not None:
+                self._stream.push(tick)
+            self._sleep(self._interval)
+
+    def stop(self):
+        self._stopped.set()
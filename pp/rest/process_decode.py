@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from pp.rest import json_codec, page_layout
+from pp.rest.page_layout import Body, PageLayout
+from pp.tracing import tracer
+
+_Encoded = tuple[bytes, list, int]
+
+
+def _init_worker(json_decoder: str):
+    json_codec.use_decoder(json_decoder)
+
+
+def _parse_encoded(body: bytes, min_stream_bytes: int, trace: bool) -> _Encoded:
+    # workers only parse: fetching, the disk cache and transfer stats stay with the parent's config and session
+    tracer.enabled = trace
+    layout = page_layout.parse_network_page(page_layout.iter_chunks(body), min_stream_bytes)
+    return pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL), tracer.take_events(), os.getpid()
+
+
+def _decode(encoded: _Encoded) -> PageLayout:
+    payload, events, pid = encoded
+    if events:
+        tracer.add_events(events, pid, 'decode-worker-' + str(pid))
+    return pickle.loads(payload)
+
+
+class ProcessPageDecoder:
+    def __init__(self, max_workers: int, fetch: Callable[[str], Body] = page_layout.load_page_body,
+                 fetch_cached: Callable[[str], Optional[Body]] = page_layout.load_cached_body,
+                 json_decoder: Optional[str] = None, min_stream_bytes: Optional[int] = None):
+        self._max_workers = max_workers
+        self._fetch = fetch
+        self._fetch_cached = fetch_cached
+        self._json_decoder = json_decoder if json_decoder is not None else page_layout.config.json_decoder
+        self._min_stream_bytes = min_stream_bytes if min_stream_bytes is not None \
+            else page_layout.config.stream_parse_min_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker, initargs=(self._json_decoder,))
+            return self._executor
+
+    def parse(self, body: Body) -> PageLayout:
+        future = self._pool().submit(_parse_encoded, bytes(body), self._min_stream_bytes, tracer.enabled)
+        return _decode(future.result())
+
+    def load(self, page: str) -> PageLayout:
+        return self.parse(self._fetch(page))
+
+    def load_cached(self, page: str) -> Optional[PageLayout]:
+        body = self._fetch_cached(page)
+        if body is None:
+            return None
+        return self.parse(body)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
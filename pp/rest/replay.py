@@ -0,0 +1,386 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+Chunk = Union[bytes, memoryview]
+_replay_chunk_size = 16 * 1024
+_encoding_preference = ('zstd', 'br', 'gzip', 'deflate')
+
+
+def _available_encoders() -> dict[str, Callable[[bytes], bytes]]:
+    encoders: dict[str, Callable[[bytes], bytes]] = {'gzip': gzip.compress, 'deflate': zlib.compress}
+    try:
+        import brotli
+        encoders['br'] = brotli.compress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        encoders['zstd'] = zstandard.ZstdCompressor().compress
+    except ImportError:
+        pass
+    return encoders
+
+
+encoders = _available_encoders()
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name)
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    accepted = accepted_encodings(header)
+    return next((encoding for encoding in _encoding_preference if encoding in accepted and encoding in encoders),
+                None)
+
+
+def fixture_key(slug: str, query_string: str) -> str:
+    return slug + '?' + urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+
+
+def slug_from_path(path: str) -> Optional[str]:
+    parts = path.strip('/').split('/')
+    if len(parts) == 3 and parts[0] == 'sdspp' and parts[2] == 'v3':
+        return parts[1]
+    return None
+
+
+class Fixture:
+    def __init__(self, key: str, body: bytes, first_byte_seconds: float, total_seconds: float):
+        self.key = key
+        self.body = body
+        self.first_byte_seconds = first_byte_seconds
+        self.total_seconds = total_seconds
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = encoders[encoding](self.body)
+        return body
+
+
+class FixtureStore:
+    def __init__(self, directory: Path):
+        self._directory = directory
+        self._loaded: dict[str, Optional[Fixture]] = {}
+        self._lock = threading.Lock()
+
+    def _stem_for(self, key: str) -> Path:
+        return self._directory / hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Optional[Fixture]:
+        with self._lock:
+            if key in self._loaded:
+                return self._loaded[key]
+        stem = self._stem_for(key)
+        try:
+            meta = json.loads(stem.with_suffix('.json').read_text())
+            body = stem.with_suffix('.body').read_bytes()
+        except (OSError, ValueError):
+            fixture = None
+        else:
+            fixture = Fixture(key, body, meta.get('first_byte_seconds', 0.0), meta.get('total_seconds', 0.0)) \
+                if meta.get('key') == key else None
+        with self._lock:
+            self._loaded[key] = fixture
+        return fixture
+
+    def save(self, key: str, body: bytes, first_byte_seconds: float, total_seconds: float):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        stem = self._stem_for(key)
+        meta = {'key': key, 'first_byte_seconds': first_byte_seconds, 'total_seconds': total_seconds,
+                'recorded_at': time.time()}
+        for suffix, data in (('.body', body), ('.json', json.dumps(meta, indent=2).encode('utf-8'))):
+            fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, stem.with_suffix(suffix))
+        with self._lock:
+            self._loaded[key] = Fixture(key, body, first_byte_seconds, total_seconds)
+
+    def keys(self) -> list[str]:
+        keys = []
+        for meta_path in sorted(self._directory.glob('*.json')):
+            try:
+                keys.append(json.loads(meta_path.read_text())['key'])
+            except (OSError, ValueError, KeyError):
+                continue
+        return keys
+
+
+class Recorder:
+    def __init__(self, store: FixtureStore, clock: Callable[[], float] = time.monotonic):
+        self._store = store
+        self._clock = clock
+
+    def record(self, slug: str, query_string: str, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        start = self._clock()
+        first_byte: Optional[float] = None
+        parts = []
+        for chunk in chunks:
+            if first_byte is None:
+                first_byte = self._clock() - start
+            parts.append(bytes(chunk))
+            yield chunk
+        total = self._clock() - start
+        self._store.save(fixture_key(slug, query_string), b''.join(parts),
+                         first_byte if first_byte is not None else total, total)
+
+
+class ReplayPolicy:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, reset_rate: float = 0.0,
+                 use_recorded_timing: bool = False, seed: Optional[int] = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.use_recorded_timing = use_recorded_timing
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> tuple[float, bool, bool]:
+        with self._lock:
+            delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0.0)
+            fail = self._random.random() < self.error_rate
+            reset = not fail and self._random.random() < self.reset_rate
+        return delay, fail, reset
+
+
+class ReplayStats:
+    def __init__(self):
+        self.requests = 0
+        self.served = 0
+        self.not_modified = 0
+        self.missing = 0
+        self.injected_errors = 0
+        self.injected_resets = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class ReplayResponse:
+    def __init__(self, status: int, headers: dict[str, str], chunks: Iterator[bytes]):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+
+
+class Replayer:
+    def __init__(self, store: FixtureStore, policy: Optional[ReplayPolicy] = None,
+                 sleep: Callable[[float], None] = time.sleep, compress: bool = False):
+        self.store = store
+        self.policy = policy if policy is not None else ReplayPolicy()
+        self.compress = compress
+        self.stats = ReplayStats()
+        self._sleep = sleep
+
+    def respond(self, slug: Optional[str], query_string: str, request_headers: dict[str, str]) -> ReplayResponse:
+        self.stats.count('requests')
+        delay, fail, reset = self.policy.draw()
+        fixture = self.store.load(fixture_key(slug, query_string)) if slug is not None else None
+        if fixture is not None and self.policy.use_recorded_timing:
+            delay += fixture.first_byte_seconds
+        self._sleep(delay)
+
+        if fail:
+            self.stats.count('injected_errors')
+            return ReplayResponse(503, {'Content-Length': '0'}, iter(()))
+        if fixture is None:
+            self.stats.count('missing')
+            return ReplayResponse(404, {'Content-Length': '0'}, iter(()))
+        if request_headers.get('If-None-Match') == fixture.etag:
+            self.stats.count('not_modified')
+            return ReplayResponse(304, {'ETag': fixture.etag}, iter(()))
+        self.stats.count('served')
+        if reset:
+            self.stats.count('injected_resets')
+        encoding = choose_encoding(request_headers.get('Accept-Encoding', '')) if self.compress else None
+        body = fixture.encoded(encoding)
+        headers = {'ETag': fixture.etag, 'Content-Type': 'application/json', 'Content-Length': str(len(body))}
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+            headers['Vary'] = 'Accept-Encoding'
+        return ReplayResponse(200, headers, self._body_chunks(fixture, body, reset))
+
+    def _body_chunks(self, fixture: Fixture, body: bytes, reset: bool) -> Iterator[bytes]:
+        end = len(body) // 2 if reset else len(body)
+        chunk_count = max((len(body) + _replay_chunk_size - 1) // _replay_chunk_size, 1)
+        pause = (fixture.total_seconds - fixture.first_byte_seconds) / chunk_count \
+            if self.policy.use_recorded_timing else 0.0
+        for start in range(0, end, _replay_chunk_size):
+            if pause > 0:
+                self._sleep(pause)
+            yield body[start:min(start + _replay_chunk_size, end)]
+        if reset:
+            raise ConnectionResetError('Injected connection reset')
+
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'ReplayServer'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        response = self.server.replayer.respond(slug_from_path(url.path), url.query, dict(self.headers.items()))
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            for chunk in response.chunks:
+                self.wfile.write(chunk)
+        except ConnectionResetError:
+            self.close_connection = True
+
+    def log_message(self, format: str, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, replayer: Replayer, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _ReplayRequestHandler)
+        self.replayer = replayer
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return 'http://' + host + ':' + str(port) + '/sdspp/'
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class _ReplayRaw(io.RawIOBase):
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, replayer: Replayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        replayed = self.replayer.respond(slug_from_path(url.path), url.query, dict(request.headers.items()))
+        response = requests.Response()
+        response.status_code = replayed.status
+        response.headers = CaseInsensitiveDict(replayed.headers)
+        response.raw = io.BufferedReader(_ReplayRaw(replayed.chunks))
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            _ = response.content
+        return response
+
+    def close(self):
+        pass
+
+
+def import_mock_data(store: FixtureStore):
+    from pp.rest import page_layout
+    mock_dir = Path(page_layout.__file__).parent / 'mock_data'
+    for page, file in (('HOMEPAGE', 'homepage.json'), ('IN-PLAY', 'in-play.json'), ('FOOTBALL', 'football.json')):
+        request = page_layout.page_request(page)
+        store.save(fixture_key(request.slug, request.query_string),
+                   (mock_dir / file).read_bytes(), 0.05, 0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded strands responses')
+    parser.add_argument('fixtures', type=Path, help='directory of recorded fixtures')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added before every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='uniform +/- seconds applied to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='fraction of bodies cut off half way')
+    parser.add_argument('--recorded-timing', action='store_true', help='replay recorded first-byte and body timings')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compress', action='store_true',
+                        help='compress bodies with the best encoding the client accepts (' + ', '.join(encoders) + ')')
+    parser.add_argument('--import-mock-data', action='store_true', help='add the bundled mock pages as fixtures')
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    if args.import_mock_data:
+        import_mock_data(store)
+    policy = ReplayPolicy(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          reset_rate=args.reset_rate, use_recorded_timing=args.recorded_timing, seed=args.seed)
+    server = ReplayServer(Replayer(store, policy, compress=args.compress), port=args.port)
+    print('Serving ' + str(len(store.keys())) + ' fixtures at ' + server.base_url)
+    print('Run the client with PADDYCURSES_STRANDS_URL=' + server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from pp.rest.page_layout import PageLayout
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class BudgetClosedError(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._tokens + (now - self._updated) * self._rate, self._burst)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def seconds_until_token(self) -> float:
+        self._refill()
+        return max((1.0 - self._tokens) / self._rate, 0.0)
+
+
+class BudgetTicket:
+    __slots__ = ('priority', 'sequence', 'start', 'queued_at')
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.sequence = 0
+        self.start: Optional[Callable[[], None]] = None
+        self.queued_at = 0.0
+
+
+class BudgetStats:
+    def __init__(self):
+        self.granted = 0
+        self.delayed = 0
+        self.seconds_waited = 0.0
+
+
+class RequestBudget:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self._bucket = TokenBucket(rate, burst, clock)
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._waiting: list[BudgetTicket] = []
+        self._sequence = itertools.count()
+        self._closed = False
+        self._dispatcher: Optional[threading.Thread] = None
+        self.stats = BudgetStats()
+
+    def _next_ticket(self) -> BudgetTicket:
+        return min(self._waiting, key=lambda waiting: (waiting.priority, waiting.sequence))
+
+    def schedule(self, ticket: BudgetTicket, start: Callable[[], None]):
+        with self._condition:
+            if self._closed:
+                raise BudgetClosedError('Request budget closed')
+            if self._waiting or not self._bucket.try_take():
+                ticket.sequence = next(self._sequence)
+                ticket.start = start
+                ticket.queued_at = self._clock()
+                self._waiting.append(ticket)
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, name='request-budget', daemon=True)
+                    self._dispatcher.start()
+                self._condition.notify_all()
+                return
+            self.stats.granted += 1
+        start()
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    if not self._waiting:
+                        self._condition.wait()
+                        continue
+                    ticket = self._next_ticket()
+                    if self._bucket.try_take():
+                        break
+                    self._condition.wait(self._bucket.seconds_until_token())
+                self._waiting.remove(ticket)
+                self.stats.granted += 1
+                self.stats.delayed += 1
+                self.stats.seconds_waited += self._clock() - ticket.queued_at
+                start, ticket.start = ticket.start, None
+            start()
+
+    def withdraw(self, ticket: BudgetTicket) -> bool:
+        with self._condition:
+            if ticket not in self._waiting:
+                return False
+            self._waiting.remove(ticket)
+            ticket.start = None
+            return True
+
+    def raise_priority(self, ticket: BudgetTicket, priority: int):
+        with self._condition:
+            if priority < ticket.priority:
+                ticket.priority = priority
+                self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class _InFlight:
+    __slots__ = ('future', 'ticket')
+
+    def __init__(self, priority: int):
+        self.future: Future = Future()
+        self.ticket = BudgetTicket(priority)
+
+
+class CoordinatorStats:
+    def __init__(self):
+        self.started = 0
+        self.coalesced = 0
+
+
+class RequestCoordinator:
+    def __init__(self, budget: Optional[RequestBudget] = None):
+        self.budget = budget
+        self._in_flight: dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.stats = CoordinatorStats()
+
+    def join(self, key: str, priority: int) -> tuple[Future, bool]:
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+                if self.budget is not None:
+                    self.budget.raise_priority(flight.ticket, priority)
+                return flight.future, False
+            flight = self._in_flight[key] = _InFlight(priority)
+            self.stats.started += 1
+            return flight.future, True
+
+    def start(self, key: str, future: Future, fetch: Callable[[], PageLayout], submit: Callable[..., Future]):
+        with self._lock:
+            flight = self._in_flight.get(key)
+        if flight is None or flight.future is not future:
+            return
+        if self.budget is None:
+            self._submit(key, flight, fetch, submit)
+            return
+        try:
+            self.budget.schedule(flight.ticket, lambda: self._submit(key, flight, fetch, submit))
+        except BudgetClosedError as e:
+            self._fail(key, flight, e)
+
+    def _submit(self, key: str, flight: _InFlight, fetch: Callable[[], PageLayout], submit: Callable[..., Future]):
+        try:
+            submit(self._run, key, flight, fetch)
+        except RuntimeError as e:
+            self._fail(key, flight, e)
+
+    def _run(self, key: str, flight: _InFlight, fetch: Callable[[], PageLayout]):
+        if not flight.future.set_running_or_notify_cancel():
+            return
+        try:
+            flight.future.set_result(fetch())
+        except Exception as e:
+            flight.future.set_exception(e)
+        finally:
+            self._forget(key, flight)
+
+    def _fail(self, key: str, flight: _InFlight, error: Exception):
+        if flight.future.set_running_or_notify_cancel():
+            flight.future.set_exception(error)
+        self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _InFlight):
+        with self._lock:
+            if self._in_flight.get(key) is flight:
+                del self._in_flight[key]
+
+    def cancel(self, key: str) -> bool:
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is None or flight.ticket.priority == INTERACTIVE or not flight.future.cancel():
+                return False
+            del self._in_flight[key]
+        if self.budget is not None:
+            self.budget.withdraw(flight.ticket)
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            for flight in self._in_flight.values():
+                flight.future.cancel()
+        if self.budget is not None:
+            self.budget.close()
@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from pp.rest.page_loader import PageLoader
+
+
+class SpeculativePrefetcher:
+    def __init__(self, loader: PageLoader, dwell_seconds: float = 0.25, max_in_flight: int = 2,
+                 clock: Callable[[], float] = time.monotonic):
+        self._loader = loader
+        self._dwell_seconds = dwell_seconds
+        self._max_in_flight = max_in_flight
+        self._clock = clock
+        self._candidate: Optional[str] = None
+        self._candidate_since: float = 0.0
+        self._in_flight: dict[str, Future] = {}
+
+    def hover(self, page: Optional[str]):
+        if page == self._candidate:
+            return
+        self._cancel_queued(keep=page)
+        self._candidate = page
+        self._candidate_since = self._clock()
+
+    def tick(self):
+        self._in_flight = {page: future for page, future in self._in_flight.items() if not future.done()}
+        if self._candidate is None or self._candidate in self._in_flight:
+            return
+        if self._clock() - self._candidate_since < self._dwell_seconds:
+            return
+        if len(self._in_flight) >= self._max_in_flight:
+            return
+        for future in self._loader.prefetch([self._candidate]):
+            self._in_flight[self._candidate] = future
+        self._candidate = None
+
+    def seconds_until_due(self) -> Optional[float]:
+        if self._candidate is None:
+            return None
+        if len(self._in_flight) >= self._max_in_flight:
+            return self._dwell_seconds
+        return max(self._candidate_since + self._dwell_seconds - self._clock(), 0.0)
+
+    def _cancel_queued(self, keep: Optional[str]):
+        for page in list(self._in_flight.keys()):
+            if page != keep and self._loader.cancel_prefetch(page):
+                del self._in_flight[page]
@@ -0,0 +1,270 @@
+import re
+from itertools import chain
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from pp.model import card_market_query, coupon_market_query, event_card_types
+from pp.rest import json_codec
+
+Chunk = Union[bytes, memoryview]
+
+_whitespace = re.compile(rb'[ \t\n\r]*')
+_string = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(?P<close>")?')
+
+
+def _nested_patterns(max_depth: int) -> tuple[re.Pattern, re.Pattern]:
+    string = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    run = rb'(?:[^"\[\]{}]++|' + string + rb')*+'
+    for _ in range(max_depth):
+        container = rb'[\[{]' + run + rb'[\]}]'
+        run = rb'(?:[^"\[\]{}]++|' + string + rb'|' + container + rb')*+'
+    return re.compile(container), re.compile(run)
+
+
+# matches whole containers nested up to two deep in one call, leaving deeper ones to _skip_nested
+_shallow_container, _nested_run = _nested_patterns(2)
+_scalar = re.compile(rb'[^,:\[\]{}\s]+')
+_kept_card = re.compile(rb'"type"\s*:\s*"(?:COUPON|' + '|'.join(event_card_types).encode() + rb')"')
+_market_event = re.compile(rb'"eventId"\s*:\s*(\d+)')
+_market_competition = re.compile(rb'"competitionId"\s*:\s*(\d+)')
+
+_kept_layout_keys = ('tabs', 'tabsDisplayOrder', 'defaultTab', 'page')
+_kept_attachment_keys = ('events', 'competitions')
+
+
+class StreamParseError(Exception):
+    pass
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[Chunk]):
+        self._chunks: Iterator[Chunk] = iter(chunks)
+        self.buf: bytes = b''
+        self.pos: int = 0
+        self.mark: Optional[int] = None
+        self.size: int = 0
+        self.exhausted: bool = False
+
+    def fill(self) -> bool:
+        if self.exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return False
+        self.size += len(chunk)
+        keep_from = self.pos if self.mark is None else min(self.pos, self.mark)
+        self.buf = self.buf[keep_from:] + chunk
+        self.pos -= keep_from
+        if self.mark is not None:
+            self.mark -= keep_from
+        return True
+
+    def drain(self):
+        self.pos = len(self.buf)
+        while self.fill():
+            self.pos = len(self.buf)
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self) -> bytes:
+        self.skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise StreamParseError('Unexpected end of response')
+        return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: bytes):
+        if self.peek() != char:
+            raise StreamParseError('Expected ' + char.decode() + ' at byte '
+                                   + str(self.size - len(self.buf) + self.pos))
+        self.pos += 1
+
+    def consume_if(self, char: bytes) -> bool:
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def read_string(self) -> str:
+        self.peek()
+        while True:
+            match = _string.match(self.buf, self.pos)
+            if match is not None and match.group('close') is not None:
+                self.pos = match.end()
+                return json_codec.loads(match.group())
+            if not self.fill():
+                raise StreamParseError('Unterminated string')
+
+    def value_span(self, keep: bool) -> Optional[bytes]:
+        first = self.peek()
+        self.mark = self.pos if keep else None
+        if first == b'{' or first == b'[':
+            self._skip_nested()
+        elif first == b'"':
+            self.read_string()
+        else:
+            self._skip_scalar()
+        if not keep:
+            return None
+        span = self.buf[self.mark:self.pos]
+        self.mark = None
+        return span
+
+    def _skip_scalar(self):
+        while True:
+            match = _scalar.match(self.buf, self.pos)
+            if match is not None and (match.end() < len(self.buf) or self.exhausted):
+                self.pos = match.end()
+                return
+            if not self.fill() and match is None:
+                raise StreamParseError('Unexpected end of response')
+
+    def _skip_nested(self):
+        match = _shallow_container.match(self.buf, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            return
+        depth = 0
+        while True:
+            buf = self.buf
+            pos = self.pos
+            end = len(buf)
+            while True:
+                pos = _nested_run.match(buf, pos).end()
+                if pos == end or buf[pos] == 0x22:
+                    break
+                if buf[pos] == 0x7b or buf[pos] == 0x5b:
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = pos + 1
+                        return
+                pos += 1
+            self.pos = pos
+            if not self.fill():
+                raise StreamParseError('Unexpected end of response')
+
+    def decode_value(self) -> Any:
+        return json_codec.loads(self.value_span(keep=True))
+
+    def skip_value(self):
+        self.value_span(keep=False)
+
+    def object_keys(self) -> Iterator[str]:
+        self.expect(b'{')
+        if self.consume_if(b'}'):
+            return
+        while True:
+            key = self.read_string()
+            self.expect(b':')
+            yield key
+            if self.consume_if(b'}'):
+                return
+            self.expect(b',')
+
+
+def _parse_layout(reader: _Reader, layout: dict[str, Any], raw_coupons: dict[str, bytes]):
+    for key in reader.object_keys():
+        if key == 'cards':
+            cards = {}
+            for card_id in reader.object_keys():
+                span = reader.value_span(keep=True)
+                if _kept_card.search(span) is not None:
+                    card = json_codec.loads(span)
+                    if card.get('type') == 'COUPON' or card.get('type') in event_card_types:
+                        cards[card_id] = card
+            layout['cards'] = cards
+        elif key == 'coupons':
+            for coupon_id in reader.object_keys():
+                raw_coupons[coupon_id] = reader.value_span(keep=True)
+        elif key in _kept_layout_keys:
+            layout[key] = reader.decode_value()
+        else:
+            reader.skip_value()
+
+
+class _MarketFilter:
+    """Markets named by a coupon, or on an event or competition that an events coupon or in-play card shows."""
+
+    def __init__(self, layout: dict[str, Any], coupons: dict[str, Any]):
+        self.market_ids = {coupon['marketId'] for coupon in coupons.values() if 'marketId' in coupon}
+        queries = [query for query in chain(map(coupon_market_query, coupons.values()),
+                                            map(card_market_query, layout.get('cards', {}).values()))
+                   if query is not None]
+        self.event_ids = {event_id for query in queries for event_id in query.event_ids}
+        self.competition_ids = {competition_id for query in queries for competition_id in query.competition_ids}
+
+    def needs_body(self) -> bool:
+        return bool(self.event_ids or self.competition_ids)
+
+    def wants(self, market_id: str, raw: bytes) -> bool:
+        if market_id in self.market_ids:
+            return True
+        event = _market_event.search(raw)
+        if event is not None and int(event.group(1)) in self.event_ids:
+            return True
+        competition = _market_competition.search(raw)
+        return competition is not None and int(competition.group(1)) in self.competition_ids
+
+
+def _parse_attachments(reader: _Reader, attachments: dict[str, Any], raw_markets: dict[str, bytes],
+                       market_filter: Optional[_MarketFilter]):
+    for key in reader.object_keys():
+        if key == 'markets':
+            for market_id in reader.object_keys():
+                if market_filter is None or market_id in market_filter.market_ids:
+                    raw_markets[market_id] = reader.value_span(keep=True)
+                elif market_filter.needs_body():
+                    raw = reader.value_span(keep=True)
+                    if market_filter.wants(market_id, raw):
+                        raw_markets[market_id] = raw
+                else:
+                    reader.skip_value()
+        elif key in _kept_attachment_keys:
+            attachments[key] = reader.decode_value()
+        else:
+            reader.skip_value()
+
+
+def _referenced_coupon_ids(layout: dict[str, Any]) -> set[str]:
+    card_ids = {str(card['id'])
+                for tab in layout.get('tabs', {}).values() if tab.get('type', 'TAB') == 'TAB'
+                for card in tab.get('cards', [])}
+    return {str(coupon['id'])
+            for card_id, card in layout.get('cards', {}).items() if card_id in card_ids
+            for coupon in card.get('coupons', [])}
+
+
+def _decode_coupons(layout: dict[str, Any], raw_coupons: dict[str, bytes]) -> dict[str, Any]:
+    wanted = _referenced_coupon_ids(layout)
+    return {coupon_id: json_codec.loads(raw) for coupon_id, raw in raw_coupons.items() if coupon_id in wanted}
+
+
+def stream_layout(chunks: Iterable[Chunk]) -> tuple[dict[str, Any], int]:
+    reader = _Reader(chunks)
+    layout: dict[str, Any] = {}
+    attachments: dict[str, Any] = {}
+    raw_coupons: dict[str, bytes] = {}
+    raw_markets: dict[str, bytes] = {}
+    coupons: Optional[dict[str, Any]] = None
+    for key in reader.object_keys():
+        if key == 'layout':
+            _parse_layout(reader, layout, raw_coupons)
+            coupons = _decode_coupons(layout, raw_coupons)
+        elif key == 'attachments':
+            _parse_attachments(reader, attachments, raw_markets,
+                               None if coupons is None else _MarketFilter(layout, coupons))
+        else:
+            reader.skip_value()
+    reader.drain()
+
+    layout['coupons'] = coupons if coupons is not None else _decode_coupons(layout, raw_coupons)
+    layout.setdefault('cards', {})
+    market_filter = _MarketFilter(layout, layout['coupons'])
+    attachments['markets'] = {market_id: json_codec.loads(raw)
+                              for market_id, raw in raw_markets.items() if market_filter.wants(market_id, raw)}
+    return {'layout': layout, 'attachments': attachments}, reader.size
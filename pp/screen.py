@@ -0,0 +1,359 @@
+import curses
+import os
+from _curses import window
+from typing import Callable, Optional, Union
+
+# a cursor move costs about this many bytes, so shorter unchanged gaps are cheaper to resend than to jump over
+_max_run_gap = 6
+
+
+def _resize_curses(rows: int, cols: int):
+    # getch has already resized curses by the time KEY_RESIZE arrives; ncurses 6.x queues another KEY_RESIZE
+    # on every resizeterm call, even one to the current size, which keeps the resize debouncer from settling
+    if curses.is_term_resized(rows, cols):
+        curses.resizeterm(rows, cols)
+
+
+class CursesBackend:
+    def newwin(self, rows: int, cols: int, y: int, x: int):
+        return curses.newwin(rows, cols, y, x)
+
+    def newpad(self, rows: int, cols: int):
+        return curses.newpad(rows, cols)
+
+    def color_pair(self, pair: int) -> int:
+        return curses.color_pair(pair)
+
+    def init_pair(self, pair: int, foreground: int, background: int):
+        curses.init_pair(pair, foreground, background)
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def resizeterm(self, rows: int, cols: int):
+        _resize_curses(rows, cols)
+
+
+class HeadlessStats:
+    def __init__(self):
+        self.cells_written = 0
+        self.refreshes = 0
+        self.updates = 0
+        self.cells_flushed = 0
+        self.bytes_flushed = 0
+        self.last_frame_cells = 0
+        self.last_frame_runs = 0
+        self.last_frame_bytes = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return {'cells_written': self.cells_written, 'refreshes': self.refreshes, 'updates': self.updates,
+                'cells_flushed': self.cells_flushed, 'bytes_flushed': self.bytes_flushed}
+
+
+class HeadlessWindow:
+    def __init__(self, backend: 'HeadlessBackend', rows: int, cols: int, y: int = 0, x: int = 0,
+                 is_pad: bool = False):
+        if rows <= 0 or cols <= 0:
+            raise curses.error('invalid window size')
+        self._backend = backend
+        self._rows = rows
+        self._cols = cols
+        self._y = y
+        self._x = x
+        self._is_pad = is_pad
+        self._cursor = (0, 0)
+        self._background = 0
+        self.cells: list[list[str]] = [[' '] * cols for _ in range(rows)]
+        self.attrs: list[list[int]] = [[0] * cols for _ in range(rows)]
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self._rows, self._cols
+
+    def erase(self):
+        for row, attrs in zip(self.cells, self.attrs):
+            row[:] = [' '] * self._cols
+            attrs[:] = [self._background] * self._cols
+        self._cursor = (0, 0)
+
+    def bkgd(self, ch: Union[str, int], attr: int = 0):
+        previous = self._background
+        self._background = attr
+        for attrs in self.attrs:
+            attrs[:] = [attr if cell_attr == previous else cell_attr for cell_attr in attrs]
+
+    def move(self, y: int, x: int):
+        self._check(y, x)
+        self._cursor = (y, x)
+
+    def clrtoeol(self):
+        y, x = self._cursor
+        self.cells[y][x:] = [' '] * (self._cols - x)
+        self.attrs[y][x:] = [self._background] * (self._cols - x)
+        self._backend.stats.cells_written += self._cols - x
+
+    def addch(self, y: int, x: int, ch: Union[str, int], attr: int = 0):
+        self._write(y, x, ch if isinstance(ch, str) else chr(ch), attr)
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        self._write(y, x, text, attr)
+
+    def addnstr(self, y: int, x: int, text: str, n: int, attr: int = 0):
+        self._write(y, x, text[:n], attr)
+
+    def border(self):
+        self._write(0, 0, '┌' + '─' * (self._cols - 2) + '┐', 0)
+        for y in range(1, self._rows - 1):
+            self._write(y, 0, '│', 0)
+            self._write(y, self._cols - 1, '│', 0)
+        try:
+            self._write(self._rows - 1, 0, '└' + '─' * (self._cols - 2) + '┘', 0)
+        except curses.error:
+            pass
+
+    def resize(self, rows: int, cols: int):
+        if rows <= 0 or cols <= 0:
+            raise curses.error('invalid window size')
+        cells = [[' '] * cols for _ in range(rows)]
+        attrs = [[self._background] * cols for _ in range(rows)]
+        kept_cols = min(cols, self._cols)
+        for y in range(min(rows, self._rows)):
+            cells[y][:kept_cols] = self.cells[y][:kept_cols]
+            attrs[y][:kept_cols] = self.attrs[y][:kept_cols]
+        self.cells = cells
+        self.attrs = attrs
+        self._rows = rows
+        self._cols = cols
+        self._cursor = (0, 0)
+
+    def mvwin(self, y: int, x: int):
+        self._y = y
+        self._x = x
+
+    def noutrefresh(self, *args: int):
+        if self._is_pad:
+            pad_top, pad_left, screen_top, screen_left, screen_bottom, screen_right = args
+        else:
+            pad_top, pad_left = 0, 0
+            screen_top, screen_left = self._y, self._x
+            screen_bottom, screen_right = self._y + self._rows - 1, self._x + self._cols - 1
+        self._backend.stats.refreshes += 1
+        self._backend.copy_to_virtual(self, pad_top, pad_left, screen_top, screen_left, screen_bottom, screen_right)
+
+    def _check(self, y: int, x: int):
+        if not (0 <= y < self._rows and 0 <= x < self._cols):
+            raise curses.error('position ' + str((y, x)) + ' outside ' + str((self._rows, self._cols)))
+
+    def _write(self, y: int, x: int, text: str, attr: int):
+        self._check(y, x)
+        if attr & curses.A_COLOR == 0:
+            attr |= self._background
+        for ch in text:
+            self.cells[y][x] = ch
+            self.attrs[y][x] = attr
+            self._backend.stats.cells_written += 1
+            x += 1
+            if x == self._cols:
+                x = 0
+                y += 1
+                if y == self._rows:
+                    self._cursor = (self._rows - 1, self._cols - 1)
+                    raise curses.error('write past end of window')
+        self._cursor = (y, x)
+
+
+def _colour_sgr(colour: int, base: int) -> str:
+    return str(base + 9) if colour < 0 else str(base + colour) if colour < 8 else f'{base + 8};5;{colour}'
+
+
+class HeadlessBackend:
+    def __init__(self, rows: int = 40, cols: int = 120, debug_overlay: bool = False):
+        self.rows = rows
+        self.cols = cols
+        self.stats = HeadlessStats()
+        self.debug_overlay = debug_overlay
+        self._pairs: dict[int, tuple[int, int]] = {0: (-1, -1)}
+        self._sgr_cache: dict[int, str] = {}
+        self._emitted_attr: Optional[int] = None
+        self.virtual: list[list[str]] = []
+        self.virtual_attrs: list[list[int]] = []
+        self.physical: list[list[str]] = []
+        self.physical_attrs: list[list[int]] = []
+        self._reset_grids()
+        self.stdscr = HeadlessWindow(self, rows, cols)
+
+    def _reset_grids(self):
+        self.virtual = [[' '] * self.cols for _ in range(self.rows)]
+        self.virtual_attrs = [[0] * self.cols for _ in range(self.rows)]
+        self.physical = [[' '] * self.cols for _ in range(self.rows)]
+        self.physical_attrs = [[0] * self.cols for _ in range(self.rows)]
+        self._emitted_attr = None
+
+    def newwin(self, rows: int, cols: int, y: int, x: int) -> HeadlessWindow:
+        return HeadlessWindow(self, rows, cols, y, x)
+
+    def newpad(self, rows: int, cols: int) -> HeadlessWindow:
+        return HeadlessWindow(self, rows, cols, is_pad=True)
+
+    def color_pair(self, pair: int) -> int:
+        return pair << 8
+
+    def init_pair(self, pair: int, foreground: int, background: int):
+        self._pairs[pair] = (foreground, background)
+        self._sgr_cache.clear()
+
+    def copy_to_virtual(self, source: HeadlessWindow, src_top: int, src_left: int, screen_top: int,
+                        screen_left: int, screen_bottom: int, screen_right: int):
+        rows, cols = source.getmaxyx()
+        screen_bottom = min(screen_bottom, self.rows - 1, screen_top + rows - src_top - 1)
+        screen_right = min(screen_right, self.cols - 1, screen_left + cols - src_left - 1)
+        width = screen_right - screen_left + 1
+        if width <= 0:
+            return
+        for screen_y in range(max(screen_top, 0), screen_bottom + 1):
+            src_y = src_top + screen_y - screen_top
+            self.virtual[screen_y][screen_left:screen_right + 1] = source.cells[src_y][src_left:src_left + width]
+            self.virtual_attrs[screen_y][screen_left:screen_right + 1] = \
+                source.attrs[src_y][src_left:src_left + width]
+
+    def doupdate(self):
+        self.stats.updates += 1
+        if self.debug_overlay:
+            self._draw_overlay()
+        frame, cells, runs = self._encode_frame()
+        self.stats.cells_flushed += cells
+        self.stats.bytes_flushed += len(frame)
+        self.stats.last_frame_cells = cells
+        self.stats.last_frame_runs = runs
+        self.stats.last_frame_bytes = len(frame)
+        if frame:
+            self._emit(frame)
+
+    def _emit(self, frame: bytes):
+        pass
+
+    def _draw_overlay(self):
+        stats = self.stats
+        text = f' {stats.last_frame_bytes:>6} B {stats.last_frame_runs:>4} runs {stats.last_frame_cells:>5} cells '
+        text = text[-self.cols:]
+        x = self.cols - len(text)
+        self.virtual[-1][x:] = list(text)
+        self.virtual_attrs[-1][x:] = [curses.A_REVERSE] * len(text)
+
+    def _encode_frame(self) -> tuple[bytes, int, int]:
+        out: list[str] = []
+        cells = 0
+        runs = 0
+        for y in range(self.rows):
+            virtual_row, physical_row = self.virtual[y], self.physical[y]
+            virtual_attrs, physical_attrs = self.virtual_attrs[y], self.physical_attrs[y]
+            if virtual_row == physical_row and virtual_attrs == physical_attrs:
+                continue
+            changed = [x for x in range(self.cols)
+                       if virtual_row[x] != physical_row[x] or virtual_attrs[x] != physical_attrs[x]]
+            cells += len(changed)
+            start = end = changed[0]
+            for x in changed[1:] + [None]:
+                if x is not None and x - end <= _max_run_gap:
+                    end = x
+                    continue
+                runs += 1
+                out.append(f'\x1b[{y + 1};{start + 1}H')
+                for run_x in range(start, end + 1):
+                    attr = virtual_attrs[run_x]
+                    if attr != self._emitted_attr:
+                        out.append(self._sgr(attr))
+                        self._emitted_attr = attr
+                    out.append(virtual_row[run_x])
+                if x is not None:
+                    start = end = x
+            physical_row[:] = virtual_row
+            physical_attrs[:] = virtual_attrs
+        return ''.join(out).encode('utf-8'), cells, runs
+
+    def _sgr(self, attr: int) -> str:
+        sgr = self._sgr_cache.get(attr)
+        if sgr is None:
+            parts = ['0']
+            if attr & curses.A_BOLD:
+                parts.append('1')
+            if attr & curses.A_REVERSE:
+                parts.append('7')
+            foreground, background = self._pairs.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+            parts.append(_colour_sgr(foreground, 30))
+            parts.append(_colour_sgr(background, 40))
+            sgr = '\x1b[' + ';'.join(parts) + 'm'
+            self._sgr_cache[attr] = sgr
+        return sgr
+
+    def resizeterm(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self._reset_grids()
+        self.stdscr.resize(rows, cols)
+
+    def screen_text(self) -> list[str]:
+        return [''.join(row) for row in self.physical]
+
+
+class ShadowFrameBackend(HeadlessBackend):
+    def __init__(self, stdscr: window, debug_overlay: bool = False,
+                 write: Optional[Callable[[bytes], None]] = None):
+        super().__init__(*stdscr.getmaxyx(), debug_overlay=debug_overlay)
+        self._stdscr = stdscr
+        self._write = write if write is not None else self._write_to_terminal
+        # let curses send its initial clear now, so it cannot wipe frames written behind its back later
+        stdscr.refresh()
+
+    @staticmethod
+    def _write_to_terminal(data: bytes):
+        while data:
+            data = data[os.write(1, data):]
+
+    def init_pair(self, pair: int, foreground: int, background: int):
+        curses.init_pair(pair, foreground, background)
+        super().init_pair(pair, foreground, background)
+
+    def _emit(self, frame: bytes):
+        self._write(frame)
+
+    def resizeterm(self, rows: int, cols: int):
+        _resize_curses(rows, cols)
+        self._stdscr.clear()
+        self._stdscr.refresh()
+        super().resizeterm(rows, cols)
+
+
+_backend: Union[CursesBackend, HeadlessBackend] = CursesBackend()
+
+
+def use_backend(backend: Union[CursesBackend, HeadlessBackend]):
+    global _backend
+    _backend = backend
+
+
+def current_backend() -> Union[CursesBackend, HeadlessBackend]:
+    return _backend
+
+
+def newwin(rows: int, cols: int, y: int, x: int):
+    return _backend.newwin(rows, cols, y, x)
+
+
+def newpad(rows: int, cols: int):
+    return _backend.newpad(rows, cols)
+
+
+def color_pair(pair: int) -> int:
+    return _backend.color_pair(pair)
+
+
+def init_pair(pair: int, foreground: int, background: int):
+    _backend.init_pair(pair, foreground, background)
+
+
+def doupdate():
+    _backend.doupdate()
+
+
+def resizeterm(rows: int, cols: int):
+    _backend.resizeterm(rows, cols)
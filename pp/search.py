@@ -0,0 +1,238 @@
+import bisect
+import heapq
+import re
+from itertools import chain, islice
+from typing import Iterable, Optional
+
+from pp.model import TabId
+from pp.rest.page_layout import PageLayout
+
+_word = re.compile(r'[^\W_]+')
+_short_prefix_length = 2
+_max_results = 200
+_walk_ratio = 0.1
+
+
+def search_words(text: str) -> list[str]:
+    return _word.findall(text.casefold())
+
+
+class SearchHit:
+    __slots__ = ('kind', 'text', 'context', 'page', 'tab_id', 'coupon_id', 'words', 'tier', 'sort_key')
+
+    def __init__(self, kind: str, text: str, context: str, page: str, tab_id: Optional[TabId],
+                 coupon_id: Optional[int]):
+        self.kind = kind
+        self.text = text
+        self.context = context
+        self.page = page
+        self.tab_id = tab_id
+        self.coupon_id = coupon_id
+        self.words = tuple(set(search_words(text)))
+        self.tier = 0 if kind == 'event' else 1
+        self.sort_key = text.casefold()
+
+    def label(self) -> str:
+        return self.text + ' (' + self.kind + ', ' + self.context + ')'
+
+
+def page_hits(page: str, page_title: str, layout: PageLayout) -> Iterable[SearchHit]:
+    event_tabs: dict[int, tuple[TabId, Optional[int]]] = {}
+    seen_coupons = set()
+    for tab in layout.tabs:
+        for card_id in tab.card_ids:
+            card = layout.cards.get(card_id)
+            if card is None:
+                continue
+            for shown in card.event_markets:
+                event_tabs.setdefault(shown.event.id, (tab.id, None))
+            for coupon in card.coupons:
+                if coupon.event_id is not None:
+                    event_tabs.setdefault(coupon.event_id, (tab.id, coupon.id))
+                for shown in coupon.event_markets:
+                    event_tabs.setdefault(shown.event.id, (tab.id, coupon.id))
+                if coupon.id in seen_coupons:
+                    continue
+                seen_coupons.add(coupon.id)
+                yield SearchHit('coupon', coupon.label(), page_title + ' / ' + tab.title, page, tab.id, coupon.id)
+
+    competition_tabs: dict[int, tuple[TabId, Optional[int]]] = {}
+    for event in layout.events.values():
+        tab_id, coupon_id = event_tabs.get(event.id, (layout.default_tab, None))
+        context = page_title if event.competition is None else page_title + ' / ' + event.competition
+        yield SearchHit('event', event.name, context, page, tab_id, coupon_id)
+        if event.competition_id is not None:
+            competition_tabs.setdefault(event.competition_id, (tab_id, coupon_id))
+
+    for competition_id, name in layout.competitions.items():
+        tab_id, coupon_id = competition_tabs.get(competition_id, (layout.default_tab, None))
+        yield SearchHit('competition', name, page_title, page, tab_id, coupon_id)
+
+
+class _Tier:
+    """Postings and ranking for the hits of one kind group; every hit of a lower tier ranks first."""
+
+    def __init__(self):
+        self.postings: dict[str, set[int]] = {}
+        self.short_postings: dict[str, set[int]] = {}
+        self.words: list[str] = []
+        self.ranked: list[int] = []
+        self.recent: list[int] = []
+        self.live = 0
+
+    def add(self, page_postings: dict[str, list[int]], hit_ids: list[int], sort_keys: dict[int, str]):
+        for word, word_hit_ids in page_postings.items():
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = set()
+                bisect.insort(self.words, word)
+            postings.update(word_hit_ids)
+            for length in range(1, min(len(word), _short_prefix_length) + 1):
+                self.short_postings.setdefault(word[:length], set()).update(word_hit_ids)
+        self.live += len(hit_ids)
+        self._rank(hit_ids, sort_keys)
+
+    def remove(self, page_postings: dict[str, list[int]], hit_ids: list[int]):
+        for word, word_hit_ids in page_postings.items():
+            postings = self.postings[word]
+            postings.difference_update(word_hit_ids)
+            if not postings:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+            for length in range(1, min(len(word), _short_prefix_length) + 1):
+                short = self.short_postings.get(word[:length])
+                if short is None:
+                    # an earlier word of the page shared this prefix and already emptied it
+                    continue
+                short.difference_update(word_hit_ids)
+                if not short:
+                    del self.short_postings[word[:length]]
+        self.live -= len(hit_ids)
+
+    def _rank(self, hit_ids: list[int], sort_keys: dict[int, str]):
+        # hits of removed pages stay in the rankings until the next rebuild; no search can match them
+        recent = list(filter(sort_keys.__contains__, self.recent))
+        recent.extend(hit_ids)
+        stale = len(self.ranked) - (self.live - len(recent))
+        if len(recent) + stale > len(self.ranked) // 8:
+            self.ranked = sorted(filter(sort_keys.__contains__, chain(self.ranked, recent)),
+                                 key=sort_keys.__getitem__)
+            self.recent = []
+        else:
+            recent.sort(key=sort_keys.__getitem__)
+            self.recent = recent
+
+    def prefix_matches(self, prefix: str) -> set[int]:
+        if len(prefix) <= _short_prefix_length:
+            return self.short_postings.get(prefix, set())
+        first = bisect.bisect_left(self.words, prefix)
+        last = bisect.bisect_left(self.words, prefix + '\uffff', first)
+        if last - first == 1:
+            return self.postings[self.words[first]]
+        matches = set()
+        for word in islice(self.words, first, last):
+            matches.update(self.postings[word])
+        return matches
+
+    def matching_ids(self, words: list[str], narrowed: Optional[set[int]]) -> set[int]:
+        candidates = sorted((self.prefix_matches(word) for word in set(words)), key=len)
+        if narrowed is not None and len(narrowed) < len(candidates[0]):
+            candidates.insert(0, narrowed)
+        return candidates[0].intersection(*candidates[1:]) if len(candidates) > 1 else candidates[0]
+
+    def best_ids(self, matches: set[int], sort_keys: dict[int, str], limit: int) -> Iterable[int]:
+        # walking the presorted ranking stops after `limit` hits; sorting wins when the matches are few
+        if len(matches) * len(matches) > _walk_ratio * limit * (len(self.ranked) + len(self.recent)):
+            best = filter(matches.__contains__, self.ranked)
+            if self.recent:
+                best = heapq.merge(best, filter(matches.__contains__, self.recent), key=sort_keys.__getitem__)
+            return islice(best, limit)
+        return sorted(matches, key=sort_keys.__getitem__)[:limit]
+
+
+class SearchIndex:
+    def __init__(self, max_results: int = _max_results):
+        self._max_results = max_results
+        self._hits: dict[int, SearchHit] = {}
+        self._sort_keys: dict[int, str] = {}
+        self._next_id = 0
+        self._page_hits: dict[str, list[int]] = {}
+        self._tiers = (_Tier(), _Tier())
+        self._last_query: Optional[list[str]] = None
+        self._last_matches: tuple[set[int], ...] = tuple(set() for _ in self._tiers)
+        self._last_result: Optional[tuple[tuple[set[int], ...], list[SearchHit]]] = None
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+    def add_page(self, page: str, page_title: str, layout: PageLayout):
+        self._remove_page(page)
+        hit_ids = []
+        tier_hit_ids: tuple[list[int], ...] = tuple([] for _ in self._tiers)
+        tier_postings: tuple[dict[str, list[int]], ...] = tuple({} for _ in self._tiers)
+        for hit in page_hits(page, page_title, layout):
+            hit_id = self._next_id
+            self._next_id += 1
+            self._hits[hit_id] = hit
+            self._sort_keys[hit_id] = hit.sort_key
+            hit_ids.append(hit_id)
+            tier_hit_ids[hit.tier].append(hit_id)
+            page_postings = tier_postings[hit.tier]
+            for word in hit.words:
+                page_postings.setdefault(word, []).append(hit_id)
+        for tier, page_postings, ids in zip(self._tiers, tier_postings, tier_hit_ids):
+            tier.add(page_postings, ids, self._sort_keys)
+        self._page_hits[page] = hit_ids
+        self._last_query = None
+        self._last_result = None
+
+    def _remove_page(self, page: str):
+        tier_hit_ids: tuple[list[int], ...] = tuple([] for _ in self._tiers)
+        tier_postings: tuple[dict[str, list[int]], ...] = tuple({} for _ in self._tiers)
+        for hit_id in self._page_hits.pop(page, ()):
+            del self._sort_keys[hit_id]
+            hit = self._hits.pop(hit_id)
+            tier_hit_ids[hit.tier].append(hit_id)
+            page_postings = tier_postings[hit.tier]
+            for word in hit.words:
+                page_postings.setdefault(word, []).append(hit_id)
+        for tier, page_postings, ids in zip(self._tiers, tier_postings, tier_hit_ids):
+            if ids:
+                tier.remove(page_postings, ids)
+
+    def _narrows_last_query(self, words: list[str]) -> bool:
+        last = self._last_query
+        if last is None or len(words) < len(last) or len(last) == 0:
+            return False
+        return words[:len(last) - 1] == last[:-1] and words[len(last) - 1].startswith(last[-1])
+
+    def matching_ids(self, query: str) -> tuple[set[int], ...]:
+        words = search_words(query)
+        if not words:
+            matches = tuple(set() for _ in self._tiers)
+        else:
+            narrows = self._narrows_last_query(words)
+            matches = tuple(tier.matching_ids(words, last if narrows else None)
+                            for tier, last in zip(self._tiers, self._last_matches))
+        self._last_query = words
+        self._last_matches = matches
+        return matches
+
+    def _best_hits(self, matches: tuple[set[int], ...]) -> list[SearchHit]:
+        hits: list[SearchHit] = []
+        for tier, tier_matches in zip(self._tiers, matches):
+            if tier_matches and len(hits) < self._max_results:
+                best = tier.best_ids(tier_matches, self._sort_keys, self._max_results - len(hits))
+                hits.extend(map(self._hits.__getitem__, best))
+        return hits
+
+    def search(self, query: str) -> tuple[list[SearchHit], int]:
+        matches = self.matching_ids(query)
+        count = sum(map(len, matches))
+        last = self._last_result
+        if last is not None and all(old is new or len(old) == len(new) and old == new
+                                    for old, new in zip(last[0], matches)):
+            return last[1], count
+        hits = self._best_hits(matches)
+        self._last_result = (matches, hits)
+        return hits, count
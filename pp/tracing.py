@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterable
+
+_max_events = 100_000
+_histogram_window = 512
+
+
+class LatencyHistogram:
+    def __init__(self, window: int = _histogram_window):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentiles(self, *fractions: float) -> list[float]:
+        samples = sorted(self._samples)
+        if not samples:
+            return [0.0 for _ in fractions]
+        return [samples[min(int(len(samples) * fraction), len(samples) - 1)] for fraction in fractions]
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class Span:
+    __slots__ = ('_tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._tracer.finish(self, time.perf_counter())
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_events: int = _max_events):
+        self.enabled = enabled
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._events: deque[tuple[str, str, float, float, int, dict[str, Any]]] = deque(maxlen=max_events)
+        self._thread_names: dict[int, str] = {}
+        self._origin = time.perf_counter()
+
+    def span(self, name: str, category: str = 'app', **args: Any):
+        if not self.enabled:
+            return _null_span
+        return Span(self, name, category, args)
+
+    def finish(self, span: Span, end: float):
+        duration = end - span.start
+        self._record(span.name, duration)
+        thread_id = threading.get_ident()
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = threading.current_thread().name
+        self._events.append((span.name, span.category, span.start, duration, thread_id, span.args))
+
+    def _record(self, name: str, duration: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram())
+        histogram.record(duration)
+
+    def take_events(self) -> list[tuple[str, str, float, float, int, dict[str, Any]]]:
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    def add_events(self, events: Iterable[tuple[str, str, float, float, int, dict[str, Any]]], thread_id: int,
+                   thread_name: str):
+        # spans taken from another process; perf_counter is system-wide, so their starts line up with ours
+        self._thread_names.setdefault(thread_id, thread_name)
+        for name, category, start, duration, _, args in events:
+            self._record(name, duration)
+            self._events.append((name, category, start, duration, thread_id, args))
+
+    def summary(self, names: Iterable[str]) -> str:
+        parts = []
+        for name in names:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                continue
+            p50, p95 = histogram.percentiles(0.5, 0.95)
+            parts.append(f'{name} {p50 * 1000:.1f}/{p95 * 1000:.1f}ms')
+        return '  '.join(parts)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        pid = os.getpid()
+        events: list[dict[str, Any]] = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                                         'args': {'name': name}}
+                                        for thread_id, name in list(self._thread_names.items())]
+        for name, category, start, duration, thread_id, args in list(self._events):
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': thread_id,
+                           'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+                           'args': {key: str(value) for key, value in args.items()}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path: Path):
+        path.write_text(json.dumps(self.chrome_trace()))
+
+
+tracer = Tracer()
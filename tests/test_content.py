@@ -0,0 +1,72 @@
+import curses
+
+import pytest
+
+from pp import screen
+from pp.content import ContentView
+from pp.model import Card, Coupon, Event, EventMarket, Market, Price, Runner, Tab
+
+_cards = 5_000
+
+
+def price(numerator: int) -> Price:
+    return Price(1 + numerator, numerator, 1)
+
+
+def market(market_id: str) -> Market:
+    return Market(market_id, 'Match Odds', 'OPEN', [Runner(i, 'Runner ' + str(i), 'ACTIVE', price(2)) for i in range(3)])
+
+
+def big_tab() -> Tab:
+    cards = []
+    for card_index in range(_cards):
+        coupons = [Coupon(card_index * 10 + i, 'MATCH_ODDS', 'Coupon ' + str(card_index * 10 + i), None, None,
+                          market('m' + str(card_index * 10 + i)) if i == 0 else None) for i in range(2)]
+        event_markets = [EventMarket(Event(card_index, 'Event ' + str(card_index), None, None),
+                                     market('e' + str(card_index)))] if card_index % 2 else []
+        cards.append(Card(card_index, 'Card ' + str(card_index), tuple(c.id for c in coupons), coupons, event_markets))
+    return Tab(1, 'Tab', cards=cards)
+
+
+def eager_lines(tab: Tab) -> list[str]:
+    lines = []
+    for card in tab.cards:
+        lines.append('  ' + card.title)
+        for coupon in card.coupons:
+            lines.append('    ' + coupon.label())
+            lines += ['      ' + runner.name for runner in (coupon.market.runners if coupon.market else [])]
+        for shown in card.event_markets:
+            lines.append('    ' + shown.event.name)
+            lines += ['      ' + runner.name for runner in shown.market.runners]
+    return lines
+
+
+@pytest.fixture
+def view() -> ContentView:
+    screen.use_backend(screen.HeadlessBackend(40, 120))
+    return ContentView(40, 120)
+
+
+def test_loading_a_tab_builds_only_the_cards_near_the_viewport(view: ContentView):
+    tab = big_tab()
+    view.load_new_tab(tab, {})
+    assert len(view._items._built) < 10 and len(view._runner_lines) < 40
+    view.process_keystroke(curses.KEY_END)
+    expected = eager_lines(tab)
+    assert view._first_line == len(expected) - view._viewport_rows
+    assert [view._items[i] for i in range(len(expected))] == expected
+
+
+def test_lines_built_later_show_ticks_and_coupon_updates_that_arrived_first(view: ContentView):
+    tab = big_tab()
+    view.load_new_tab(tab, {})
+    far = tab.cards[_cards // 2 + 1]
+    view.apply_prices({('e' + str(far.id), 1): price(9)})
+    renamed = Coupon(far.coupons[1].id, 'MATCH_ODDS', 'Renamed', None, None)
+    view.update_coupons({renamed.id: renamed}, {renamed.id})
+
+    view.scroll_to_coupon(renamed.id)
+    line = view._coupon_lines[renamed.id][0]
+    assert view._first_line == line - 1 and view._items[line] == '    Renamed'
+    runner_line = view._runner_lines[('e' + str(far.id), 1)][0]
+    assert view._line_prices[runner_line] == price(9)
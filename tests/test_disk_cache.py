@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+
+from pp.rest import page_layout
+from pp.rest.disk_cache import DiskCache
+from pp.rest.page_registry import PageRequest
+
+_day = 24 * 60 * 60.0
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class NotModified:
+    status_code = 304
+    headers: dict[str, str] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class RecordingSession:
+    def __init__(self):
+        self.headers: list[dict[str, str]] = []
+
+    def get(self, headers: dict[str, str], **kwargs):
+        self.headers.append(headers)
+        return NotModified()
+
+
+def test_store_and_load_round_trip(tmp_path: Path):
+    clock = FakeClock()
+    cache = DiskCache(tmp_path, clock=clock)
+    cache.store('page', b'{"layout": {}}', etag='"abc"', last_modified='Mon, 19 Oct 2026 10:00:00 GMT')
+    cached = cache.load('page')
+    assert bytes(cached.body) == b'{"layout": {}}' and cached.stored_at == clock.now
+    assert cached.revalidation_headers() == {'If-None-Match': '"abc"',
+                                             'If-Modified-Since': 'Mon, 19 Oct 2026 10:00:00 GMT'}
+    assert cache.load('other page') is None
+
+
+def test_not_modified_replays_and_refreshes_the_entry(tmp_path: Path, monkeypatch):
+    clock = FakeClock()
+    cache = DiskCache(tmp_path, max_age=_day, clock=clock)
+    session = RecordingSession()
+    request = PageRequest('PAGE', 'page', {}, 'a=1')
+    cache.store(request.cache_key, b'{"cached": true}', etag='"v1"')
+    monkeypatch.setattr(page_layout, 'disk_cache', cache)
+    monkeypatch.setattr(page_layout, 'strands_session', lambda: session)
+
+    clock.now += _day - 60
+    assert b''.join(page_layout.make_strands_request(request)) == b'{"cached": true}'
+    assert session.headers == [{'If-None-Match': '"v1"'}]
+    assert cache.load(request.cache_key).stored_at == clock.now
+
+    clock.now += 120
+    cache.sweep()
+    assert cache.load(request.cache_key) is not None
+
+
+def test_sweep_drops_expired_entries_then_the_oldest_over_budget(tmp_path: Path):
+    clock = FakeClock()
+    cache = DiskCache(tmp_path, max_bytes=2500, max_age=_day, clock=clock)
+    for index, name in enumerate(['old', 'a', 'b', 'c']):
+        cache.store(name, bytes(1000))
+        clock.now += 2 * _day if index == 0 else 60
+    cache.sweep()
+    assert [name for name in ['old', 'a', 'b', 'c'] if cache.load(name) is not None] == ['b', 'c']
+
+
+def test_sweep_removes_abandoned_temp_files(tmp_path: Path):
+    clock = FakeClock()
+    cache = DiskCache(tmp_path, clock=clock)
+    abandoned, writing = tmp_path / 'abandoned.tmp', tmp_path / 'writing.tmp'
+    for path, age in ((abandoned, 2 * 60 * 60.0), (writing, 60.0)):
+        path.write_bytes(b'partial')
+        os.utime(path, (clock.now - age, clock.now - age))
+    cache.sweep()
+    assert not abandoned.exists() and writing.exists()
+
+
+def test_sweeps_again_after_an_eighth_of_the_budget_is_written(tmp_path: Path):
+    clock = FakeClock()
+    cache = DiskCache(tmp_path, max_bytes=8000, max_age=_day, clock=clock)
+    cache.store('expiring', b'x')
+    clock.now += 2 * _day
+    cache.store('small', b'x')
+    assert cache.load('expiring') is not None
+    cache.store('large', bytes(1000))
+    cache.store('next', b'x')
+    assert cache.load('expiring') is None and cache.load('large') is not None
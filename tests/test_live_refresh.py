@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import main
+from pp import screen
+from pp.content import ContentView
+from pp.rest.live_refresh import diff_layouts
+from pp.rest.page_layout import parse_page
+from pp.tabs import TabView
+
+_mock_data = Path(__file__).resolve().parent.parent / 'pp' / 'rest' / 'mock_data'
+
+
+def mocked_json(name: str) -> dict:
+    return json.loads((_mock_data / (name + '.json')).read_bytes())
+
+
+def parse(data: dict):
+    return parse_page(json.dumps(data).encode())
+
+
+def featured_market(data: dict) -> dict:
+    event_id = data['layout']['cards']['INPLAY_FEATURED']['content'][0]['eventId']
+    return next(market for market in data['attachments']['markets'].values() if market['eventId'] == event_id)
+
+
+def set_price(runner: dict, numerator: int, denominator: int):
+    runner['winRunnerOdds']['trueOdds'] = {'decimalOdds': {'decimalOdds': 1 + numerator / denominator},
+                                           'fractionalOdds': {'numerator': numerator, 'denominator': denominator}}
+
+
+def test_unchanged_page_is_not_a_change():
+    data = mocked_json('in-play')
+    changes = diff_layouts(parse(data), parse(data))
+    assert not changes.structure_changed and not changes.changed_coupons and not changes.price_ticks
+
+
+def test_event_market_price_moves_are_price_only():
+    data = mocked_json('in-play')
+    old = parse(data)
+    market = featured_market(data)
+    set_price(market['runners'][0], 40, 1)
+    changes = diff_layouts(old, parse(data))
+    assert not changes.structure_changed and not changes.changed_coupons
+    assert [(tick.market_id, tick.selection_id, tick.price.fractional()) for tick in changes.price_ticks] \
+        == [(market['marketId'], market['runners'][0]['selectionId'], '40/1')]
+
+
+def test_coupon_title_change_updates_only_that_coupon():
+    data = mocked_json('football')
+    old = parse(data)
+    coupon_id = next(iter(old.tab(old.default_tab).cards[0].coupon_ids))
+    data['layout']['coupons'][str(coupon_id)]['title'] = 'Renamed'
+    changes = diff_layouts(old, parse(data))
+    assert not changes.structure_changed and changes.changed_coupons == {coupon_id} and not changes.price_ticks
+
+
+@pytest.mark.parametrize('change', ['drop_featured_event', 'add_runner', 'drop_coupon', 'retitle_card'])
+def test_structure_changes(change: str):
+    data = mocked_json('in-play' if change in ('drop_featured_event', 'add_runner') else 'football')
+    old = parse(data)
+    if change == 'drop_featured_event':
+        del data['layout']['cards']['INPLAY_FEATURED']['content'][0]
+    elif change == 'add_runner':
+        runners = featured_market(data)['runners']
+        runners.append(dict(runners[0], selectionId=999_999))
+    else:
+        card = data['layout']['cards'][str(old.tab(old.default_tab).cards[0].id)]
+        if change == 'drop_coupon':
+            removed = card['coupons'].pop()['id']
+            del data['layout']['coupons'][str(removed)]
+        else:
+            card['title'] = 'Renamed'
+    assert diff_layouts(old, parse(data)).structure_changed
+
+
+def test_price_only_refresh_rebinds_tab_switching_to_the_new_layout():
+    screen.use_backend(screen.HeadlessBackend(40, 120))
+    views = {'tabs': TabView(120), 'content': ContentView(40, 120)}
+    data = mocked_json('in-play')
+    old = parse(data)
+    main.show_page('IN-PLAY', old, views)
+    set_price(featured_market(data)['runners'][0], 40, 1)
+    new = parse(data)
+    assert not diff_layouts(old, new).structure_changed
+
+    main.rebind_page(new, views)
+    other_tab = views['tabs']._tab_loader(old.tabs[1].id)
+    assert other_tab is new.tab(old.tabs[1].id) and views['content']._tab is new.tab(new.default_tab)
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from pp.rest.page_layout import PageLayout, parse_network_page, parse_page, parse_page_stream
+from pp.rest.price_stream import PriceStream, SimulatedPriceFeed
+
+_mock_data = Path(__file__).resolve().parent.parent / 'pp' / 'rest' / 'mock_data'
+
+
+def mocked_body(name: str) -> bytes:
+    return (_mock_data / (name + '.json')).read_bytes()
+
+
+def chunked(body: bytes, size: int):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+def shown_content(layout: PageLayout) -> list:
+    content = []
+    for tab in layout.tabs:
+        cards = layout.tab(tab.id).cards
+        content.append((tab, cards, [card.coupons for card in cards], [card.event_markets for card in cards]))
+    return content
+
+
+@pytest.mark.parametrize('page', ['homepage', 'football', 'in-play'])
+@pytest.mark.parametrize('chunk_size', [7, 4096, 1 << 20])
+def test_stream_parse_matches_full_parse(page: str, chunk_size: int):
+    body = mocked_body(page)
+    full = parse_page(body)
+    streamed = parse_page_stream(chunked(body, chunk_size))
+    assert streamed.default_tab == full.default_tab and streamed.page_info == full.page_info
+    assert shown_content(streamed) == shown_content(full)
+    assert streamed.events == full.events and streamed.competitions == full.competitions
+    assert streamed.displayed_markets() == full.displayed_markets()
+
+
+def test_network_pages_stream_only_past_the_threshold(monkeypatch):
+    body = mocked_body('football')
+    parsed = []
+    monkeypatch.setattr('pp.rest.page_layout.parse_page_stream', lambda chunks: parsed.append('stream'))
+    monkeypatch.setattr('pp.rest.page_layout.parse_page', lambda data: parsed.append('full'))
+    parse_network_page(chunked(body, 4096), min_stream_bytes=len(body) + 1)
+    parse_network_page(chunked(body, 4096), min_stream_bytes=len(body) // 2)
+    assert parsed == ['full', 'stream']
+
+
+def test_in_play_cards_resolve_event_markets():
+    layout = parse_page(mocked_body('in-play'))
+    tab = layout.tab(layout.default_tab)
+    shown = [shown for card in tab.cards for shown in card.event_markets]
+    assert [card.id for card in tab.cards][:2] == ['INPLAY_FEATURED', 'INPLAY_AVB_EVENT:1']
+    assert shown and all(item.market.event_id == item.event.id and item.market.runners for item in shown)
+    assert {item.market.market_id for item in shown} <= layout.displayed_markets().keys()
+
+
+def test_price_feed_watches_event_markets():
+    layout = parse_page(mocked_body('in-play'))
+    feed = SimulatedPriceFeed(PriceStream(), ticks_per_second=100, seed=1, sleep=lambda seconds: None)
+    feed.watch(layout)
+    feed.stop()
+    event_keys = {(item.market.market_id, runner.selection_id)
+                  for card in layout.cards.values() for item in card.event_markets for runner in item.market.runners
+                  if runner.price is not None}
+    tick = feed._next_tick()
+    assert event_keys and (tick.market_id, tick.selection_id) in event_keys
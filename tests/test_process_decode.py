@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+from pp.rest.page_layout import parse_page
+from pp.rest.process_decode import ProcessPageDecoder
+
+_in_play = Path(__file__).resolve().parent.parent / 'pp' / 'rest' / 'mock_data' / 'in-play.json'
+
+
+def test_pages_are_fetched_in_the_parent_and_parsed_in_a_worker():
+    fetched = []
+
+    def fetch(page: str) -> bytes:
+        fetched.append((page, os.getpid()))
+        return _in_play.read_bytes()
+
+    decoder = ProcessPageDecoder(1, fetch=fetch, fetch_cached=lambda page: memoryview(_in_play.read_bytes()))
+    try:
+        layout = decoder.load('IN-PLAY')
+        cached = decoder.load_cached('IN-PLAY')
+    finally:
+        decoder.shutdown()
+    expected = parse_page(_in_play.read_bytes())
+    assert fetched == [('IN-PLAY', os.getpid())]
+    assert layout.tabs == expected.tabs and layout.cards == expected.cards
+    assert cached.displayed_markets() == expected.displayed_markets()
+
+
+def test_missing_cached_copies_skip_the_worker():
+    decoder = ProcessPageDecoder(1, fetch=lambda page: b'', fetch_cached=lambda page: None)
+    assert decoder.load_cached('IN-PLAY') is None and decoder._executor is None
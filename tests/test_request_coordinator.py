@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pp.config import PPConfig
+from pp.rest.page_cache import PageCache
+from pp.rest.page_layout import PageLayout
+from pp.rest.page_loader import PageLoader
+from pp.rest.request_coordinator import BACKGROUND, INTERACTIVE, BudgetTicket, RequestBudget, RequestCoordinator
+
+
+def run_inline(function, *args):
+    function(*args)
+
+
+def layout() -> PageLayout:
+    return PageLayout(tabs=[], default_tab='ALL', page_info={}, cards={}, size=100)
+
+
+def test_concurrent_requests_share_one_fetch():
+    coordinator = RequestCoordinator()
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return layout()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future, is_owner = coordinator.join('HOMEPAGE', BACKGROUND)
+        coordinator.start('HOMEPAGE', future, fetch, executor.submit)
+        joined, joined_is_owner = coordinator.join('HOMEPAGE', INTERACTIVE)
+        release.set()
+        assert is_owner and not joined_is_owner and joined is future
+        assert future.result(5) is joined.result(5)
+    assert len(fetches) == 1 and coordinator.stats.coalesced == 1
+    assert coordinator.join('HOMEPAGE', BACKGROUND)[1]
+
+
+def test_parked_interactive_requests_overtake_background_ones():
+    budget = RequestBudget(2.0, 1.0)
+    started = []
+    done = threading.Event()
+
+    def start(name: str):
+        started.append(name)
+        if len(started) == 4:
+            done.set()
+
+    budget.schedule(BudgetTicket(BACKGROUND), lambda: start('first'))
+    budget.schedule(BudgetTicket(BACKGROUND), lambda: start('background'))
+    budget.schedule(BudgetTicket(BACKGROUND), lambda: start('raised'))
+    raised = budget._waiting[-1]
+    budget.schedule(BudgetTicket(INTERACTIVE), lambda: start('interactive'))
+    budget.raise_priority(raised, INTERACTIVE)
+    assert done.wait(5)
+    budget.close()
+    assert started == ['first', 'raised', 'interactive', 'background']
+    assert budget.stats.granted == 4 and budget.stats.delayed == 3
+
+
+def test_cancelled_prefetch_leaves_the_budget_queue():
+    budget = RequestBudget(0.01, 1.0)
+    coordinator = RequestCoordinator(budget)
+    fetches = []
+    first, _ = coordinator.join('HOMEPAGE', BACKGROUND)
+    coordinator.start('HOMEPAGE', first, lambda: fetches.append('HOMEPAGE') or layout(), run_inline)
+    parked, _ = coordinator.join('FOOTBALL', BACKGROUND)
+    coordinator.start('FOOTBALL', parked, lambda: fetches.append('FOOTBALL') or layout(), run_inline)
+    assert len(budget._waiting) == 1
+
+    assert coordinator.cancel('FOOTBALL')
+    assert parked.cancelled() and not budget._waiting
+    assert fetches == ['HOMEPAGE'] and not coordinator.cancel('FOOTBALL')
+    budget.close()
+
+
+def test_interactive_requests_cannot_be_cancelled():
+    budget = RequestBudget(0.01, 1.0)
+    coordinator = RequestCoordinator(budget)
+    budget.schedule(BudgetTicket(BACKGROUND), lambda: None)
+    future, _ = coordinator.join('IN-PLAY', BACKGROUND)
+    coordinator.start('IN-PLAY', future, layout, run_inline)
+    coordinator.join('IN-PLAY', INTERACTIVE)
+    assert not coordinator.cancel('IN-PLAY') and not future.cancelled()
+    budget.close()
+
+
+def test_loading_a_page_counts_one_cache_lookup():
+    cache = PageCache(PPConfig(mocked=True))
+    loader = PageLoader(load=lambda page: layout(), load_cached=lambda page: None, cache=cache,
+                        coordinator=RequestCoordinator())
+    loader.request('HOMEPAGE')
+    deadline = time.monotonic() + 5
+    while loader.has_pending() and time.monotonic() < deadline:
+        loader.completed()
+        time.sleep(0.01)
+    loader.request('HOMEPAGE')
+    loader.shutdown()
+    assert (cache.stats.misses, cache.stats.hits, cache.stats.stale_hits) == (1, 1, 0)
@@ -0,0 +1,112 @@
+import random
+import time
+
+from pp.model import Card, Coupon, Event, Tab
+from pp.rest.page_layout import PageLayout
+from pp.search import SearchHit, SearchIndex, _max_results, page_hits, search_words
+
+_teams = ['Arsenal', 'Barcelona', 'Celtic', 'Dortmund', 'Everton', 'Fiorentina', 'Galatasaray', 'Hibernian', 'Inter',
+          'Juventus', 'Kilmarnock', 'Liverpool', 'Monaco', 'Napoli', 'Porto', 'Sevilla', 'Tottenham', 'Zenit']
+_places = ['Chicago', 'Dallas', 'Denver', 'Miami', 'Seattle', 'Boston']
+_queries = ['l', 'liverpool v', 'chicago 7', 'champ', 'sev m', 'sev monaco', 'tott', 'zenit 12', 'match odds', 'x']
+
+
+def build_layout(page_index: int, events: int, rng: random.Random) -> PageLayout:
+    base = page_index * events * 10
+    competitions = {base + i: 'Championship ' + str(page_index) + '-' + str(i) for i in range(20)}
+    event_map, coupons, cards = {}, {}, {}
+    for i in range(events):
+        event_id = base + i
+        competition_id = base + rng.randrange(20)
+        name = rng.choice(_teams) + ' v ' + rng.choice(_teams) + ' ' + rng.choice(_places) + ' ' + str(i % 100)
+        event_map[event_id] = Event(event_id, name, competition_id, competitions[competition_id])
+        coupons[event_id] = Coupon(event_id, 'MATCH_ODDS', name + ' Match Odds', event_id, None)
+    coupon_ids = tuple(coupons)
+    for card_index in range(0, len(coupon_ids), 20):
+        card_coupons = coupon_ids[card_index:card_index + 20]
+        cards[base + card_index] = Card(base + card_index, 'Card', card_coupons, [coupons[c] for c in card_coupons])
+    return PageLayout(tabs=[Tab(1, 'Matches', tuple(cards))], default_tab=1, page_info={}, cards=cards,
+                      coupons=coupons, events=event_map, competitions=competitions)
+
+
+def expected_keys(hits: list[SearchHit], query: str, max_results: int) -> tuple[list[tuple[int, str]], int]:
+    words = search_words(query)
+    matching = [hit for hit in hits
+                if words and all(any(word.startswith(prefix) for word in hit.words) for prefix in words)]
+    return sorted((hit.tier, hit.sort_key) for hit in matching)[:max_results], len(matching)
+
+
+def assert_best_ranked(index: SearchIndex, pages: dict[str, PageLayout], max_results: int):
+    all_hits = [hit for page, layout in pages.items() for hit in page_hits(page, page, layout)]
+    for query in _queries:
+        for length in range(1, len(query) + 1):
+            hits, total = index.search(query[:length])
+            assert ([(hit.tier, hit.sort_key) for hit in hits], total) == expected_keys(all_hits, query[:length], max_results)
+
+
+def test_search_returns_the_best_ranked_hits():
+    rng = random.Random(1)
+    pages = {'PAGE ' + str(i): build_layout(i, 300, rng) for i in range(6)}
+    index = SearchIndex(max_results=25)
+    for page, layout in pages.items():
+        index.add_page(page, page, layout)
+    assert_best_ranked(index, pages, 25)
+
+
+def test_ranking_survives_reindexing_pages():
+    rng = random.Random(2)
+    pages = {'PAGE ' + str(i): build_layout(i, 300, rng) for i in range(6)}
+    index = SearchIndex(max_results=25)
+    for page, layout in pages.items():
+        index.add_page(page, page, layout)
+    for round_index in range(12):
+        page = 'PAGE ' + str(round_index % 3)
+        pages[page] = build_layout(round_index % 3, 100 + 50 * round_index, rng)
+        index.add_page(page, page, pages[page])
+        assert_best_ranked(index, pages, 25)
+
+
+def test_reindexing_drops_words_that_share_a_short_prefix():
+    event = Event(1, 'Man City v Manchester Utd', None, None)
+    index = SearchIndex()
+    index.add_page('PAGE 0', 'PAGE 0', PageLayout(tabs=[Tab(1, 'Matches')], default_tab=1, page_info={}, cards={},
+                                                   events={1: event}))
+    index.add_page('PAGE 0', 'PAGE 0', PageLayout(tabs=[Tab(1, 'Matches')], default_tab=1, page_info={}, cards={}))
+    assert index.search('ma') == ([], 0)
+
+def test_events_rank_before_other_hits():
+    rng = random.Random(3)
+    pages = {'PAGE 0': build_layout(0, 50, rng)}
+    index = SearchIndex()
+    index.add_page('PAGE 0', 'PAGE 0', pages['PAGE 0'])
+    hits, total = index.search('match')
+    assert total == 50 and [hit.kind for hit in hits] == ['coupon'] * 50
+    hits, _ = index.search('liverpool')
+    kinds = [hit.kind for hit in hits]
+    assert kinds == sorted(kinds, key=lambda kind: kind != 'event')
+
+
+def test_keystroke_latency():
+    # timed against sorting each query's matches outright on the same machine, so a slow runner does not fail it;
+    # walking every page's ranking per keystroke lands near 0.13 of the full sort, the presorted ranking near 0.05
+    rng = random.Random(0)
+    index = SearchIndex()
+    pages = {'PAGE ' + str(i): build_layout(i, 1_000, rng) for i in range(20)}
+    for page, layout in pages.items():
+        index.add_page(page, page, layout)
+    pages['PAGE 0'] = build_layout(0, 1_000, rng)
+    index.add_page('PAGE 0', 'PAGE 0', pages['PAGE 0'])
+    all_hits = [hit for page, layout in pages.items() for hit in page_hits(page, page, layout)]
+    searched = sorted_outright = 0.0
+    for query in _queries:
+        for length in range(1, len(query) + 1):
+            words = search_words(query[:length])
+            matching = [hit for hit in all_hits
+                        if all(any(word.startswith(prefix) for word in hit.words) for prefix in words)]
+            start = time.perf_counter()
+            index.search(query[:length])
+            searched += time.perf_counter() - start
+            start = time.perf_counter()
+            sorted(matching, key=lambda hit: (hit.tier, hit.sort_key))[:_max_results]
+            sorted_outright += time.perf_counter() - start
+    assert searched < 0.08 * sorted_outright
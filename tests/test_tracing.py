@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from pp.rest.process_decode import ProcessPageDecoder
+from pp.tracing import Tracer, tracer
+
+
+@pytest.fixture
+def enabled_tracer():
+    tracer.enabled = True
+    tracer.take_events()
+    yield tracer
+    tracer.enabled = False
+    tracer.take_events()
+
+
+def test_added_events_keep_their_own_track():
+    source, target = Tracer(enabled=True), Tracer(enabled=True)
+    with source.span('json_loads', 'parse', page='FOOTBALL'):
+        pass
+    target.add_events(source.take_events(), 4242, 'decode-worker-4242')
+    trace = target.chrome_trace()['traceEvents']
+    assert {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': 4242,
+            'args': {'name': 'decode-worker-4242'}} in trace
+    assert [event['args'] for event in trace if event['name'] == 'json_loads'] == [{'page': 'FOOTBALL'}]
+    assert target.histograms['json_loads'].count == 1 and not source.take_events()
+
+
+def test_decode_worker_spans_reach_the_parent_tracer(enabled_tracer: Tracer):
+    decoder = ProcessPageDecoder(1)
+    try:
+        layout = decoder.load('IN-PLAY')
+    finally:
+        decoder.shutdown()
+    assert layout.tabs
+    worker_tracks = {event['tid'] for event in enabled_tracer.chrome_trace()['traceEvents']
+                     if event['ph'] == 'M' and event['args']['name'].startswith('decode-worker-')}
+    spans = {event['name'] for event in enabled_tracer.chrome_trace()['traceEvents']
+             if event['ph'] == 'X' and event['tid'] in worker_tracks}
+    assert {'json_loads', 'build_layout'} <= spans